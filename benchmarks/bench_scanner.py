@@ -0,0 +1,117 @@
+"""
+Benchmark do scanner: Scanner (tabela/bytes) vs tokenize() (regex + Token).
+
+Uso:
+    python3 benchmarks/bench_scanner.py [arquivo.txt] [--linhas N]
+
+Mede linhas/s de cada caminho (label + rem + tokenização) e bytes retidos
+por token, medidos com tracemalloc enquanto os tokens estão vivos.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compilador import Scanner, tokenize  # noqa: E402
+
+AMOSTRA = [
+    "input a",
+    "let c = a + b",
+    "let i = i + 1",
+    "if i >= n goto {alvo}",
+    "print c",
+    "rem comentario qualquer",
+    "let m = -1",
+    "goto {alvo}",
+    "let r = n % i",
+]
+
+
+def gerar(n: int) -> list:
+    """Gera n linhas SIMPLE sintéticas (em bytes)."""
+    linhas = []
+    for i in range(n):
+        modelo = AMOSTRA[i % len(AMOSTRA)]
+        linhas.append(f"{(i + 1) * 10} {modelo.format(alvo=(i // 2 + 1) * 10)}".encode())
+    return linhas
+
+
+def caminho_regex(linhas: list) -> list:
+    """Pipeline antigo: re.match do label, re.match do rem e tokenize()."""
+    saida = []
+    for i, raw in enumerate(linhas, 1):
+        line = raw.decode('utf-8')
+        if not line.strip():
+            continue
+        m = re.match(r'^\s*(\d+)\s+(.*)$', line)
+        if not m:
+            continue
+        code = m.group(2)
+        if re.match(r'^rem\b', code):
+            continue
+        tokens, _ = tokenize(code, i, m.start(2) + 1)
+        saida.append(tokens)
+    return saida
+
+
+def caminho_scanner(linhas: list) -> Scanner:
+    """Pipeline novo: uma passada do Scanner por linha, tokens em arrays."""
+    scanner = Scanner()
+    scan = scanner.scan_line
+    for i, raw in enumerate(linhas, 1):
+        scan(raw, i)
+    return scanner
+
+
+def cronometrar(fn, linhas: list, repeticoes: int) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn(linhas)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def memoria(fn, linhas: list) -> int:
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    resultado = fn(linhas)
+    retido = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del resultado
+    return retido
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do scanner SIMPLE')
+    parser.add_argument('arquivo', nargs='?', help='Fonte SIMPLE (padrão: corpus sintético)')
+    parser.add_argument('--linhas', type=int, default=200_000, help='Linhas do corpus sintético')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.arquivo:
+        with open(args.arquivo, 'rb') as f:
+            linhas = f.read().split(b'\n')
+    else:
+        linhas = gerar(args.linhas)
+
+    n_tokens = len(caminho_scanner(linhas).buf)
+    t_regex = cronometrar(caminho_regex, linhas, args.repeticoes)
+    t_scan = cronometrar(caminho_scanner, linhas, args.repeticoes)
+    m_regex = memoria(caminho_regex, linhas)
+    m_scan = memoria(caminho_scanner, linhas)
+
+    print(f"{len(linhas)} linhas, {n_tokens} tokens\n")
+    print(f"{'caminho':<22}{'linhas/s':>14}{'bytes/token':>14}")
+    print(f"{'regex + Token':<22}{len(linhas) / t_regex:>14,.0f}{m_regex / n_tokens:>14.1f}")
+    print(f"{'Scanner (arrays)':<22}{len(linhas) / t_scan:>14,.0f}{m_scan / n_tokens:>14.1f}")
+    print(f"\nSpeedup: {t_regex / t_scan:.2f}x   Memória: {m_regex / m_scan:.1f}x menor")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark de inicialização do CLI: `python3 compilador.py arquivo.txt` a frio.
+
+Uso:
+    python3 benchmarks/bench_startup.py [arquivo.txt] [--repeticoes N] [--orcamento-ms MS]
+
+Mede a mediana do tempo de parede do interpretador vazio (`python3 -c pass`),
+do import de compilador e do CLI compilando o arquivo, chamado como script e
+com -m. O custo é a diferença para o interpretador vazio; como script, o
+CPython recompila compilador.py a cada execução (o __main__ nunca usa o
+bytecode em cache), o que -m evita. Também confere, com -X importtime, que o
+caminho comum do CLI não importa os módulos pesados adiados (re, typing,
+dataclasses, argparse, tempfile, traceback).
+
+Sai com código 1 se o custo do CLI passar do orçamento ou se algum módulo
+adiado voltar a ser importado, para ser usado como verificação de regressão.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+COMPILADOR = os.path.join(RAIZ, 'compilador.py')
+PADRAO = os.path.join(RAIZ, 'testes', 'test01_soma_simples.txt')
+
+ADIADOS = ('re', 'typing', 'dataclasses', 'argparse', 'tempfile', 'traceback', 'functools')
+
+
+def ambiente() -> dict:
+    """Ambiente dos processos medidos: bytecode em cache, como no uso normal."""
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env['PYTHONPATH'] = RAIZ
+    return env
+
+
+def cronometrar(cmd: list, cwd: str, env: dict, repeticoes: int) -> float:
+    """Mediana do tempo de parede (ms); a primeira execução só aquece o cache."""
+    subprocess.run(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, check=False)
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, check=False)
+        tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tempos)
+
+
+def modulos_importados(cmd: list, cwd: str, env: dict) -> set:
+    """Nomes dos módulos importados pelo processo (saída de -X importtime)."""
+    proc = subprocess.run([cmd[0], '-X', 'importtime'] + cmd[1:], cwd=cwd, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
+    nomes = set()
+    for linha in proc.stderr.splitlines():
+        if linha.startswith('import time:') and '|' in linha:
+            nomes.add(linha.rsplit('|', 1)[1].strip())
+    return nomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de inicialização do CLI')
+    parser.add_argument('arquivo', nargs='?', default=PADRAO, help='Fonte SIMPLE compilado pelo CLI')
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--orcamento-ms', type=float, default=60.0,
+                        help='Custo máximo de compilador.py acima do interpretador vazio (padrão: 60 ms)')
+    args = parser.parse_args()
+
+    env = ambiente()
+    python = sys.executable
+    fonte = os.path.abspath(args.arquivo)
+    cli = [python, COMPILADOR, fonte]
+
+    with tempfile.TemporaryDirectory() as cwd:      # binary.txt vai para cá
+        vazio = cronometrar([python, '-c', 'pass'], cwd, env, args.repeticoes)
+        importe = cronometrar([python, '-c', 'import compilador'], cwd, env, args.repeticoes)
+        total = cronometrar(cli, cwd, env, args.repeticoes)
+        modulo = cronometrar([python, '-m', 'compilador', fonte], cwd, env, args.repeticoes)
+        adiados = sorted(modulos_importados(cli, cwd, env).intersection(ADIADOS))
+
+    print(f"{'processo':<28}{'mediana (ms)':>14}{'custo (ms)':>12}")
+    print(f"{'python3 -c pass':<28}{vazio:>14.1f}{'':>12}")
+    print(f"{'import compilador':<28}{importe:>14.1f}{importe - vazio:>12.1f}")
+    print(f"{'compilador.py arquivo':<28}{total:>14.1f}{total - vazio:>12.1f}")
+    print(f"{'-m compilador arquivo':<28}{modulo:>14.1f}{modulo - vazio:>12.1f}")
+
+    falhou = False
+    if total - vazio > args.orcamento_ms:
+        print(f"\n✗ Inicialização acima do orçamento: {total - vazio:.1f} ms > {args.orcamento_ms:.1f} ms")
+        falhou = True
+    if adiados:
+        print(f"\n✗ Módulos adiados importados no caminho comum: {', '.join(adiados)}")
+        falhou = True
+    if not falhou:
+        print(f"\n✓ Dentro do orçamento ({args.orcamento_ms:.1f} ms); nenhum módulo adiado importado")
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == '__main__':
+    main()
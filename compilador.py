@@ -15,60 +15,86 @@ Saída:
     binary.txt - Código SML executável no Simpletron
 """
 
-import re
-import sys
-from dataclasses import dataclass
-from typing import List, Optional, Dict, Tuple
+from __future__ import annotations
 
-# ═══════════════════════════════════════════════════════════════════════════
-# CÓDIGOS DE OPERAÇÃO SML (Simpletron Machine Language)
-# ═══════════════════════════════════════════════════════════════════════════
+import itertools
+import os
+import sys
+from array import array
+from bisect import bisect_left, insort
 
-class SML:
-    """Códigos de operação do Simpletron."""
-    # I/O
-    READ = 10
-    WRITE = 11
-    # Load/Store
-    LOAD = 20
-    STORE = 21
-    # Aritmética
-    ADD = 30
-    SUB = 31
-    DIV = 32
-    MUL = 33
-    MOD = 34
-    # Controle
-    BRANCH = 40
-    BRANCHNEG = 41
-    BRANCHZERO = 42
-    HALT = 43
+# Inicialização rápida: typing só para anotações; re, argparse e traceback
+# são importados apenas quando usados (ver benchmarks/bench_startup.py)
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Optional, Dict, Tuple, Iterable, Iterator, Union
 
+# Como script, este módulo também é o `compilador` importado por
+# compilador_cache (sem carregar uma segunda cópia)
+if __name__ == '__main__':
+    sys.modules.setdefault('compilador', sys.modules[__name__])
+
+# Definições compartilhadas e passadas de otimização: em módulos próprios para
+# que o script não as recompile a cada execução
+from compilador_ir import (
+    KW, MNEMONIC, OPND, REF, SML, EndStmt, Expr, GotoStmt, IfGotoStmt, InputStmt,
+    LetStmt, PrintStmt, Stmt,
+)
+from compilador_otimizacao import (
+    ALGEBRAIC_RULES, BRANCH_RULES, CFG, PEEPHOLE_RULES, SCCP, SSA, AvailableExprs,
+    def_vars, expr_key, fold_op, live_variables, optimize_branches, peephole,
+    read_masks, simplify, stmt_reads, track_accumulator,
+)
 
 # ═══════════════════════════════════════════════════════════════════════════
 # ANALISADOR LÉXICO, SINTÁTICO E SEMÂNTICO
 # ═══════════════════════════════════════════════════════════════════════════
 
-@dataclass
 class Token:
-    kind: str
-    value: str
-    line: int
-    col: int
+    """Token do tokenizador por regex (referência)."""
+    __slots__ = ('kind', 'value', 'line', 'col')
+
+    def __init__(self, kind: str, value: str, line: int, col: int):
+        self.kind = kind
+        self.value = value
+        self.line = line
+        self.col = col
+
+    def __repr__(self):
+        return f"Token(kind={self.kind!r}, value={self.value!r}, line={self.line}, col={self.col})"
 
 
-@dataclass
 class Error:
-    phase: str
-    msg: str
-    line: int
-    col: int
-    text: str
+    """Diagnóstico: fase, mensagem, posição e texto da linha."""
+    __slots__ = ('phase', 'msg', 'line', 'col', 'text')
+
+    def __init__(self, phase: str, msg: str, line: int, col: int, text: str):
+        self.phase = phase
+        self.msg = msg
+        self.line = line
+        self.col = col
+        self.text = text
+
+    def as_dict(self) -> Dict:
+        return {'phase': self.phase, 'msg': self.msg, 'line': self.line, 'col': self.col, 'text': self.text}
+
+    def __eq__(self, other):
+        if not isinstance(other, Error):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (f"Error(phase={self.phase!r}, msg={self.msg!r}, line={self.line}, "
+                f"col={self.col}, text={self.text!r})")
 
     def __str__(self):
         return f"[{self.phase.upper()}] Linha {self.line}, col {self.col}: {self.msg}\n  {self.text}\n  {' '*(self.col-1)}^"
 
 
+# Tokenizador por regex (referência): mantido para comparação no benchmark
+# do scanner; o pipeline usa o scanner de tabela (Scanner) abaixo.
 TOKEN_SPEC = [
     ('RELOP', r'==|!=|>=|<=|>|<'),
     ('NUM', r'\d+'),
@@ -83,13 +109,27 @@ TOKEN_SPEC = [
     ('WS', r'[ \t]+'),
     ('BAD', r'.'),
 ]
-TOKEN_RE = re.compile('|'.join(f'(?P<{n}>{p})' for n, p in TOKEN_SPEC))
+
+
+def _token_re():
+    """TOKEN_RE compilada no primeiro uso (evita importar re na inicialização)."""
+    regex = globals().get('TOKEN_RE')
+    if regex is None:
+        import re
+        regex = globals()['TOKEN_RE'] = re.compile('|'.join(f'(?P<{n}>{p})' for n, p in TOKEN_SPEC))
+    return regex
+
+
+def __getattr__(name: str):
+    if name == 'TOKEN_RE':
+        return _token_re()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def tokenize(code: str, line_num: int, col_offset: int) -> Tuple[List[Token], List[Error]]:
     """Tokeniza uma linha de código."""
     tokens, errors = [], []
-    for m in TOKEN_RE.finditer(code):
+    for m in _token_re().finditer(code):
         kind, val = m.lastgroup, m.group()
         col = col_offset + m.start()
         if kind == 'WS':
@@ -104,190 +144,679 @@ def tokenize(code: str, line_num: int, col_offset: int) -> Tuple[List[Token], Li
     return tokens, errors
 
 
-def parse_expr(tokens: List[Token], pos: int, stop: set) -> int:
+class TK:
+    """Códigos de tipo de token."""
+    NUM = 1
+    VAR = 2
+    KW = 3
+    RELOP = 4
+    EQ = 5
+    PLUS = 6
+    MINUS = 7
+    MUL = 8
+    DIV = 9
+    MOD = 10
+
+
+KEYWORDS = ('rem', 'input', 'let', 'print', 'goto', 'if', 'end')
+RELOPS = ('==', '!=', '<', '<=', '>', '>=')   # valor de tokens TK.RELOP
+VAR_NAMES = 'abcdefghijklmnopqrstuvwxyz'      # valor de tokens TK.VAR
+OP_TEXT = {TK.EQ: '=', TK.PLUS: '+', TK.MINUS: '-', TK.MUL: '*', TK.DIV: '/', TK.MOD: '%'}
+ARITH_KINDS = (TK.PLUS, TK.MINUS, TK.MUL, TK.DIV, TK.MOD)
+
+
+class TokenBuffer:
+    """Tokens em arrays paralelos (tipo, valor/índice, coluna), sem um objeto por token.
+
+    NUM guarda o valor, VAR o índice da letra, KW o código da palavra-chave
+    e RELOP o índice em RELOPS. lexemes guarda o texto dos NUMs que str(valor)
+    não reproduz (zeros à esquerda), para as mensagens citarem o fonte.
+    """
+    __slots__ = ('kinds', 'vals', 'cols', 'lexemes')
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.vals = array('q')
+        self.cols = array('I')
+        self.lexemes = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def truncate(self, n: int):
+        """Descarta os tokens a partir da posição n."""
+        del self.kinds[n:]
+        del self.vals[n:]
+        del self.cols[n:]
+        if self.lexemes:
+            for p in [p for p in self.lexemes if p >= n]:
+                del self.lexemes[p]
+
+    def text(self, p: int) -> str:
+        """Texto original do token na posição p."""
+        kind, val = self.kinds[p], self.vals[p]
+        if kind == TK.NUM:
+            return self.lexemes.get(p) or str(val)
+        if kind == TK.VAR:
+            return VAR_NAMES[val]
+        if kind == TK.KW:
+            return KEYWORDS[val]
+        if kind == TK.RELOP:
+            return RELOPS[val]
+        return OP_TEXT[kind]
+
+
+# Classes de caractere do scanner
+_C_BAD, _C_BLANK, _C_SPACE, _C_DIGIT, _C_LOWER, _C_EQ, _C_BANG, _C_LT, _C_GT, _C_OP = range(10)
+
+_CLASS = bytearray(256)
+for _b in b' \t':
+    _CLASS[_b] = _C_BLANK
+for _b in b'\r\n\x0b\x0c':
+    _CLASS[_b] = _C_SPACE
+for _b in b'0123456789':
+    _CLASS[_b] = _C_DIGIT
+for _b in VAR_NAMES.encode():
+    _CLASS[_b] = _C_LOWER
+_CLASS[ord('=')] = _C_EQ
+_CLASS[ord('!')] = _C_BANG
+_CLASS[ord('<')] = _C_LT
+_CLASS[ord('>')] = _C_GT
+for _b in b'+-*/%':
+    _CLASS[_b] = _C_OP
+
+_RELOP_CODE = {op.encode(): code for code, op in enumerate(RELOPS)}
+_OP_KIND = {ord('+'): TK.PLUS, ord('-'): TK.MINUS, ord('*'): TK.MUL, ord('/'): TK.DIV, ord('%'): TK.MOD}
+
+# Bytes que continuam uma palavra (\w): 'rem' seguido deles não é comentário
+_WORD = bytearray(256)
+for _b in b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_':
+    _WORD[_b] = 1
+for _b in range(0x80, 0x100):
+    _WORD[_b] = 1
+
+
+def _build_kw_dfa() -> Tuple[List[bytearray], List[int]]:
+    """Monta o DFA (trie) das palavras-chave: transições por byte e estados finais."""
+    trans = [bytearray(256)]   # 0 = sem transição (o estado inicial nunca é destino)
+    accept = [-1]
+    for code, word in enumerate(KEYWORDS):
+        state = 0
+        for b in word.encode():
+            if not trans[state][b]:
+                trans.append(bytearray(256))
+                accept.append(-1)
+                trans[state][b] = len(trans) - 1
+            state = trans[state][b]
+        accept[state] = code
+    return trans, accept
+
+
+_KW_TRANS, _KW_ACCEPT = _build_kw_dfa()
+
+
+def _char_col(raw: bytes, p: int) -> int:
+    """Coluna (1-based, em caracteres) do byte p da linha."""
+    return len(raw[:p].decode('utf-8', 'replace')) + 1
+
+
+def _bad_char(raw: bytes, p: int) -> Tuple[str, int]:
+    """Caractere inválido iniciado no byte p e seu tamanho em bytes."""
+    lead = raw[p]
+    size = 1 if lead < 0xC0 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+    return raw[p:p+size].decode('utf-8', 'replace'), size
+
+
+class Scanner:
+    """Scanner de passada única sobre bytes, dirigido por tabelas.
+
+    Extrai o label, descarta 'rem' e tokeniza o resto da linha numa única
+    varredura, acrescentando os tokens aos arrays de um TokenBuffer.
+    """
+
+    def __init__(self, buf: Optional[TokenBuffer] = None):
+        self.buf = buf if buf is not None else TokenBuffer()
+
+    def scan_line(self, raw: bytes, line_num: int) -> Optional[Tuple[int, int, int, List[Error]]]:
+        """Escaneia uma linha; retorna (label, início, fim, erros) ou None se vazia/comentário.
+
+        Se houver erros, nenhum token da linha fica no buffer.
+        """
+        cls = _CLASS
+        n = len(raw)
+        p = 0
+
+        # Espaços iniciais e label
+        while p < n and _C_BLANK <= cls[raw[p]] <= _C_SPACE:
+            p += 1
+        if p == n:
+            return None
+        if cls[raw[p]] != _C_DIGIT:
+            return 0, 0, 0, [Error('syntax', 'linha deve iniciar com label', line_num, 1, raw.decode('utf-8', 'replace'))]
+        label = 0
+        label_pos = p
+        while p < n and cls[raw[p]] == _C_DIGIT:
+            label = label * 10 + raw[p] - 48
+            p += 1
+        if p == n or not _C_BLANK <= cls[raw[p]] <= _C_SPACE:
+            return 0, 0, 0, [Error('syntax', 'linha deve iniciar com label', line_num, 1, raw.decode('utf-8', 'replace'))]
+        if label >= 1 << 63:
+            return 0, 0, 0, [Error('lex', f"label fora do intervalo: '{label}'", line_num,
+                                   _char_col(raw, label_pos), raw.decode('utf-8', 'replace'))]
+        while p < n and _C_BLANK <= cls[raw[p]] <= _C_SPACE:
+            p += 1
+        code_start = p
+
+        # Comentário
+        if raw.startswith(b'rem', p) and (p + 3 == n or not _WORD[raw[p+3]]):
+            return None
+
+        buf = self.buf
+        kinds, vals, cols = buf.kinds, buf.vals, buf.cols
+        start = len(kinds)
+        errors = None
+        while p < n:
+            b = raw[p]
+            c = cls[b]
+            col = p + 1
+            if c == _C_BLANK:
+                p += 1
+            elif c == _C_DIGIT:
+                v = 0
+                while p < n and cls[raw[p]] == _C_DIGIT:
+                    v = v * 10 + raw[p] - 48
+                    p += 1
+                if v >= 1 << 63:
+                    if errors is None:
+                        errors = []
+                    errors.append(Error('lex', f"número fora do intervalo: '{raw[col - 1:p].decode()}'", line_num,
+                                        _char_col(raw, col - 1), raw[code_start:].decode('utf-8', 'replace')))
+                    continue
+                if b == 48 and p - col > 0:      # zeros à esquerda
+                    buf.lexemes[len(kinds)] = raw[col - 1:p].decode()
+                kinds.append(TK.NUM)
+                vals.append(v)
+                cols.append(col)
+            elif c == _C_LOWER:
+                state, q = _KW_TRANS[0][b], p + 1
+                while state and _KW_ACCEPT[state] < 0 and q < n:
+                    state = _KW_TRANS[state][raw[q]]
+                    q += 1
+                if state and _KW_ACCEPT[state] >= 0:
+                    kinds.append(TK.KW)
+                    vals.append(_KW_ACCEPT[state])
+                    p = q
+                else:
+                    kinds.append(TK.VAR)
+                    vals.append(b - 97)
+                    p += 1
+                cols.append(col)
+            elif c == _C_OP:
+                kinds.append(_OP_KIND[b])
+                vals.append(0)
+                cols.append(col)
+                p += 1
+            elif c >= _C_EQ and (c != _C_BANG or (p + 1 < n and raw[p+1] == 61)):
+                two = p + 1 < n and raw[p+1] == 61   # '='
+                if c == _C_EQ and not two:
+                    kinds.append(TK.EQ)
+                    vals.append(0)
+                else:
+                    kinds.append(TK.RELOP)
+                    vals.append(_RELOP_CODE[raw[p:p+1+two]])
+                cols.append(col)
+                p += 1 + two
+            else:
+                ch, size = _bad_char(raw, p)
+                if errors is None:
+                    errors = []
+                code = raw[code_start:].decode('utf-8', 'replace')
+                col = _char_col(raw, p)
+                if ch.isupper():
+                    errors.append(Error('lex', f"maiúscula não permitida: '{ch}'", line_num, col, code))
+                else:
+                    errors.append(Error('lex', f"caractere inválido: '{ch}'", line_num, col, code))
+                p += size
+
+        if errors:
+            buf.truncate(start)
+            return label, start, start, errors
+        return label, start, len(kinds), []
+
+
+def parse_expr(buf: TokenBuffer, pos: int, end: int, stop: Tuple[int, ...]) -> int:
     """Valida expressão (máx 1 operação binária)."""
+    kinds = buf.kinds
 
     def operand(p):
-        if p >= len(tokens):
+        if p >= end:
             raise ValueError("operando esperado")
-        t = tokens[p]
-        if t.kind == 'MINUS':
-            if p+1 >= len(tokens) or tokens[p+1].kind not in ('NUM', 'VAR'):
+        k = kinds[p]
+        if k == TK.MINUS:
+            if p+1 >= end or kinds[p+1] not in (TK.NUM, TK.VAR):
                 raise ValueError("operando esperado após '-'")
             return p+2
-        if t.kind in ('NUM', 'VAR'):
+        if k in (TK.NUM, TK.VAR):
             return p+1
-        raise ValueError(f"operando inválido: '{t.value}'")
+        raise ValueError(f"operando inválido: '{buf.text(p)}'")
 
     p = operand(pos)
-    if p >= len(tokens) or tokens[p].kind in stop:
+    if p >= end or kinds[p] in stop:
         return p
-    if tokens[p].kind not in ('PLUS', 'MINUS', 'MUL', 'DIV', 'MOD'):
+    if kinds[p] not in ARITH_KINDS:
         return p
     p = operand(p+1)
-    if p < len(tokens) and tokens[p].kind not in stop:
-        raise ValueError(f"apenas 1 operação permitida, encontrado: '{tokens[p].value}'")
+    if p < end and kinds[p] not in stop:
+        raise ValueError(f"apenas 1 operação permitida, encontrado: '{buf.text(p)}'")
     return p
 
 
-def parse_stmt(tokens: List[Token], line_num: int, text: str) -> Optional[Error]:
+def parse_stmt(buf: TokenBuffer, start: int, end: int, line_num: int, text: str) -> Optional[Error]:
     """Valida sintaxe de statement."""
-    if not tokens:
+    if start == end:
         return Error('syntax', 'instrução vazia', line_num, 1, text)
 
-    kw = tokens[0]
-    if kw.kind != 'KW':
-        return Error('syntax', f"esperado comando, encontrado '{kw.value}'", line_num, kw.col, text)
+    kinds, vals = buf.kinds, buf.vals
+    n = end - start
+    col = buf.cols[start]
+    if kinds[start] != TK.KW:
+        return Error('syntax', f"esperado comando, encontrado '{buf.text(start)}'", line_num, col, text)
 
+    kw = vals[start]
     try:
-        if kw.value == 'input':
-            if len(tokens) != 2 or tokens[1].kind != 'VAR':
+        if kw == KW.INPUT:
+            if n != 2 or kinds[start+1] != TK.VAR:
                 raise ValueError("'input' requer variável")
 
-        elif kw.value == 'print':
-            if len(tokens) != 2 or tokens[1].kind != 'VAR':
+        elif kw == KW.PRINT:
+            if n != 2 or kinds[start+1] != TK.VAR:
                 raise ValueError("'print' requer variável")
 
-        elif kw.value == 'goto':
-            if len(tokens) != 2 or tokens[1].kind != 'NUM':
+        elif kw == KW.GOTO:
+            if n != 2 or kinds[start+1] != TK.NUM:
                 raise ValueError("'goto' requer número de linha")
 
-        elif kw.value == 'end':
-            if len(tokens) != 1:
+        elif kw == KW.END:
+            if n != 1:
                 raise ValueError("'end' não aceita argumentos")
 
-        elif kw.value == 'let':
-            if len(tokens) < 4 or tokens[1].kind != 'VAR' or tokens[2].kind != 'EQ':
+        elif kw == KW.LET:
+            if n < 4 or kinds[start+1] != TK.VAR or kinds[start+2] != TK.EQ:
                 raise ValueError("formato: let <var> = <expr>")
-            if parse_expr(tokens, 3, set()) != len(tokens):
+            if parse_expr(buf, start+3, end, ()) != end:
                 raise ValueError("expressão inválida")
 
-        elif kw.value == 'if':
-            p = parse_expr(tokens, 1, {'RELOP'})
-            if p >= len(tokens) or tokens[p].kind != 'RELOP':
+        elif kw == KW.IF:
+            p = parse_expr(buf, start+1, end, (TK.RELOP,))
+            if p >= end or kinds[p] != TK.RELOP:
                 raise ValueError("operador relacional esperado")
-            p = parse_expr(tokens, p+1, {'KW'})
-            if p >= len(tokens) or tokens[p].value != 'goto':
+            p = parse_expr(buf, p+1, end, (TK.KW,))
+            if p >= end or kinds[p] != TK.KW or vals[p] != KW.GOTO:
                 raise ValueError("'goto' esperado")
-            if p+1 >= len(tokens) or tokens[p+1].kind != 'NUM':
+            if p+1 >= end or kinds[p+1] != TK.NUM:
                 raise ValueError("número de linha esperado")
-            if p+2 != len(tokens):
+            if p+2 != end:
                 raise ValueError("tokens extras")
 
         return None
 
     except ValueError as e:
-        return Error('syntax', str(e), line_num, kw.col, text)
+        return Error('syntax', str(e), line_num, col, text)
+
+
+def find_goto(buf: TokenBuffer, start: int, end: int) -> int:
+    """Posição do token 'goto' no statement (-1 se não houver)."""
+    kinds, vals = buf.kinds, buf.vals
+    for p in range(start, end):
+        if kinds[p] == TK.KW and vals[p] == KW.GOTO:
+            return p
+    return -1
+
+
+CHUNK_SIZE = 1 << 16
+
+
+def read_lines(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[int, bytes]]:
+    """Lê o arquivo em blocos de tamanho fixo, produzindo (número, linha em bytes) sob demanda."""
+    with open(path, 'rb') as f:
+        n = 0
+        pending = b''
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            parts = (pending + chunk).split(b'\n')
+            pending = parts.pop()
+            for raw in parts:
+                n += 1
+                yield n, raw.rstrip(b'\r')
+        if pending:
+            yield n + 1, pending.rstrip(b'\r')
+
+
+def split_lines(data: bytes) -> Iterator[Tuple[int, bytes]]:
+    """Como read_lines(), mas sobre um fonte já em memória."""
+    parts = data.split(b'\n')
+    last = parts.pop()
+    for n, raw in enumerate(parts, 1):
+        yield n, raw.rstrip(b'\r')
+    if last:
+        yield len(parts) + 1, last.rstrip(b'\r')
+
+
+def _analyze_line(scanner: Scanner, i: int, raw: bytes) -> Tuple[Optional[Dict], List[Error]]:
+    """Análise léxica e sintática de uma linha (None para linha vazia/comentário)."""
+    scanned = scanner.scan_line(raw, i)
+    if scanned is None:
+        return None, []
+
+    label, start, end, errors = scanned
+    if errors:
+        return None, errors
+
+    # Parse
+    line = raw.decode('utf-8')
+    err = parse_stmt(scanner.buf, start, end, i, line)
+    if err:
+        scanner.buf.truncate(start)
+        return None, [err]
+
+    return {
+        'label': label,
+        'line': i,
+        'text': line,
+        'start': start,
+        'end': end
+    }, []
+
+
+class ProgramIndex:
+    """Índice do programa montado na passada de análise e reutilizado pelo gerador.
+
+    label_to_idx: label -> índice do statement
+    kws:          código da palavra-chave de cada statement
+    targets:      label de destino do goto de cada statement (-1 se não desvia)
+    target_idx:   índice do statement de destino (-1 se não desvia)
+    defs / uses:  por variável (0-25), índices dos statements que a definem / leem
+                  (uma entrada por ocorrência, em ordem crescente)
+    ends:         índices dos statements 'end'
+    """
+    __slots__ = ('label_to_idx', 'kws', 'targets', 'target_idx', 'defs', 'uses', 'ends')
+
+    def __init__(self):
+        self.label_to_idx = {}
+        self.kws = array('B')
+        self.targets = array('q')
+        self.target_idx = array('l')
+        self.defs = [[] for _ in range(26)]
+        self.uses = [[] for _ in range(26)]
+        self.ends = []
+
+    def add(self, buf: TokenBuffer, start: int, end: int):
+        """Registra o próximo statement (tokens start..end)."""
+        kinds, vals = buf.kinds, buf.vals
+        idx = len(self.kws)
+        kw = vals[start]
+        self.kws.append(kw)
+        target = -1
+
+        if kw == KW.INPUT:
+            self.defs[vals[start+1]].append(idx)
+        elif kw == KW.PRINT:
+            self.uses[vals[start+1]].append(idx)
+        elif kw == KW.LET:
+            for p in range(start+3, end):
+                if kinds[p] == TK.VAR:
+                    self.uses[vals[p]].append(idx)
+            self.defs[vals[start+1]].append(idx)
+        elif kw == KW.IF:
+            for p in range(start+1, end - 2):
+                if kinds[p] == TK.VAR:
+                    self.uses[vals[p]].append(idx)
+            target = vals[end-1]
+        elif kw == KW.GOTO:
+            target = vals[start+1]
+        elif kw == KW.END:
+            self.ends.append(idx)
+
+        self.targets.append(target)
+        self.target_idx.append(-1)
+
+    def uses_in(self, var: int, idx: int) -> bool:
+        """Se o statement idx lê a variável."""
+        uses = self.uses[var]
+        i = bisect_left(uses, idx)
+        return i < len(uses) and uses[i] == idx
+
+    def replace(self, idx: int, buf: TokenBuffer, start: int, end: int):
+        """Substitui o statement idx por outro com o mesmo destino de desvio.
+
+        Atualiza apenas as listas def/use afetadas (usado na recompilação
+        incremental quando labels e desvios não mudaram).
+        """
+        for lists in (self.defs, self.uses):
+            for entries in lists:
+                i = bisect_left(entries, idx)
+                while i < len(entries) and entries[i] == idx:
+                    del entries[i]
+
+        kinds, vals = buf.kinds, buf.vals
+        kw = self.kws[idx] = vals[start]
+        if kw == KW.INPUT:
+            insort(self.defs[vals[start+1]], idx)
+        elif kw == KW.PRINT:
+            insort(self.uses[vals[start+1]], idx)
+        elif kw in (KW.LET, KW.IF):
+            first = start+3 if kw == KW.LET else start+1
+            last = end if kw == KW.LET else end - 2
+            for p in range(first, last):
+                if kinds[p] == TK.VAR:
+                    insort(self.uses[vals[p]], idx)
+            if kw == KW.LET:
+                insort(self.defs[vals[start+1]], idx)
+
+
+class Analyzer:
+    """Análise semântica fundida ao scan/parse.
+
+    Recebe os statements um a um (add) verificando labels crescentes e
+    únicos, e monta o ProgramIndex; finish() resolve os destinos de goto e
+    valida o 'end'.
+    """
+
+    def __init__(self, buf: TokenBuffer):
+        self.buf = buf
+        self.index = ProgramIndex()
+        self.statements = []
+        self.order_errors = []
+        self.dup_errors = []
+        self.prev = None
+
+    def add(self, stmt: Dict):
+        """Registra o próximo statement válido."""
+        label = stmt['label']
+        if self.prev is not None and label <= self.prev:
+            self.order_errors.append(Error('semantic', f"label {label} não cresce após {self.prev}", stmt['line'], 1, stmt['text']))
+        if label in self.index.label_to_idx:
+            self.dup_errors.append(Error('semantic', f"label {label} duplicado", stmt['line'], 1, stmt['text']))
+        else:
+            self.index.label_to_idx[label] = len(self.statements)
+        self.prev = label
 
+        self.index.add(self.buf, stmt['start'], stmt['end'])
+        self.statements.append(stmt)
 
-def analyze(path: str) -> Tuple[List[Error], Dict]:
-    """Análise completa: léxica, sintática e semântica."""
-    errors = []
+    def finish(self) -> List[Error]:
+        """Conclui a análise semântica e retorna os erros encontrados."""
+        index, buf, statements = self.index, self.buf, self.statements
+        errors = self.order_errors + self.dup_errors
 
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-    except FileNotFoundError:
-        print(f"✗ Arquivo '{path}' não encontrado")
-        sys.exit(1)
-
-    statements = []
+        # Gotos válidos: resolve os destinos coletados na passada
+        label_to_idx = index.label_to_idx
+        for idx, target in enumerate(index.targets):
+            if target < 0:
+                continue
+            target_idx = label_to_idx.get(target)
+            if target_idx is None:
+                s = statements[idx]
+                col = buf.cols[find_goto(buf, s['start'], s['end'])]
+                errors.append(Error('semantic', f"goto para label inexistente: {target}", s['line'], col, s['text']))
+            else:
+                index.target_idx[idx] = target_idx
 
-    # Análise léxica e sintática
-    for i, raw in enumerate(lines, 1):
-        line = raw.rstrip('\n')
-        if not line.strip():
-            continue
+        # End único e final
+        ends = [statements[idx] for idx in index.ends]
+        if len(ends) > 1:
+            for e in ends:
+                errors.append(Error('semantic', "múltiplos 'end'", e['line'], 1, e['text']))
+        if ends and ends[0] is not statements[-1]:
+            errors.append(Error('semantic', "'end' deve ser último", ends[0]['line'], 1, ends[0]['text']))
 
-        m = re.match(r'^\s*(\d+)\s+(.*)$', line)
-        if not m:
-            errors.append(Error('syntax', 'linha deve iniciar com label', i, 1, line))
-            continue
+        return errors
 
-        label = int(m.group(1))
-        code = m.group(2)
-        col_offset = m.start(2) + 1
+    def data(self) -> Dict:
+        """Resultado consumido pelo SMLGenerator."""
+        return {'statements': self.statements, 'index': self.index, 'tokens': self.buf}
 
-        # Ignora comentários
-        if re.match(r'^rem\b', code):
-            continue
 
-        # Tokeniza
-        tokens, lex_errors = tokenize(code, i, col_offset)
-        errors.extend(lex_errors)
-        if lex_errors:
-            continue
+def analyze_lines(lines: Iterable[Tuple[int, bytes]]) -> Tuple[List[Error], Dict]:
+    """Análise completa: léxica, sintática e semântica numa única passada.
 
-        # Parse
-        err = parse_stmt(tokens, i, line)
-        if err:
-            errors.append(err)
-            continue
+    Além dos statements, produz um ProgramIndex (labels, destinos de desvio e
+    def/use por variável) consumido diretamente pelo gerador.
+    """
+    errors = []
+    scanner = Scanner()
+    analyzer = Analyzer(scanner.buf)
 
-        statements.append({
-            'label': label,
-            'line': i,
-            'text': line,
-            'tokens': tokens
-        })
+    for i, raw in lines:
+        stmt, line_errors = _analyze_line(scanner, i, raw)
+        if line_errors:
+            errors.extend(line_errors)
+        elif stmt is not None:
+            analyzer.add(stmt)
 
     if errors:
         return errors, {}
 
-    # Análise semântica
-    labels = [s['label'] for s in statements]
-    label_set = set(labels)
-
-    # Labels crescentes
-    for i in range(1, len(labels)):
-        if labels[i] <= labels[i-1]:
-            s = statements[i]
-            errors.append(Error('semantic', f"label {labels[i]} não cresce após {labels[i-1]}", s['line'], 1, s['text']))
-
-    # Labels únicos
-    seen = {}
-    for s in statements:
-        if s['label'] in seen:
-            errors.append(Error('semantic', f"label {s['label']} duplicado", s['line'], 1, s['text']))
-        seen[s['label']] = s['line']
-
-    # Gotos válidos
-    for s in statements:
-        for i, t in enumerate(s['tokens']):
-            if t.value == 'goto' and i+1 < len(s['tokens']):
-                target = int(s['tokens'][i+1].value)
-                if target not in label_set:
-                    errors.append(Error('semantic', f"goto para label inexistente: {target}", s['line'], t.col, s['text']))
-
-    # End único e final
-    ends = [s for s in statements if any(t.value == 'end' for t in s['tokens'])]
-    if len(ends) > 1:
-        for e in ends:
-            errors.append(Error('semantic', "múltiplos 'end'", e['line'], 1, e['text']))
-    if ends and ends[0] != statements[-1]:
-        errors.append(Error('semantic', "'end' deve ser último", ends[0]['line'], 1, ends[0]['text']))
-
-    return errors, {'statements': statements, 'labels': label_set}
+    errors = analyzer.finish()
+    return errors, analyzer.data()
+
+
+def analyze(path: str) -> Tuple[List[Error], Dict]:
+    """analyze_lines() sobre um arquivo lido em blocos (FileNotFoundError propaga)."""
+    return analyze_lines(read_lines(path))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONSTRUÇÃO DA IR (definições em compilador_ir)
+# ═══════════════════════════════════════════════════════════════════════════
+
+_ARITH_OP = {TK.PLUS: SML.ADD, TK.MINUS: SML.SUB, TK.MUL: SML.MUL, TK.DIV: SML.DIV, TK.MOD: SML.MOD}
+
+
+def _decode_operand(kinds, vals, p: int) -> Tuple[int, int, int]:
+    """Decodifica o operando em p: (tipo, valor, próxima posição)."""
+    if kinds[p] == TK.MINUS:
+        if kinds[p+1] == TK.NUM:
+            return OPND.NUM, -vals[p+1], p + 2
+        return OPND.NEG, vals[p+1], p + 2
+    return (OPND.NUM if kinds[p] == TK.NUM else OPND.VAR), vals[p], p + 1
+
+
+def decode_expr(buf: TokenBuffer, p: int, end: int) -> Expr:
+    """Decodifica a expressão (tokens p..end, já validada pelo parser)."""
+    kinds, vals = buf.kinds, buf.vals
+    lk, lv, p = _decode_operand(kinds, vals, p)
+    if p == end:
+        return Expr(Expr.MOV, lk, lv)
+    rk, rv, _ = _decode_operand(kinds, vals, p + 1)
+    return Expr(_ARITH_OP[kinds[p]], lk, lv, rk, rv)
+
+
+def build_ir(statements: List[Dict], buf: TokenBuffer) -> List[Stmt]:
+    """Converte os statements da análise (posições no TokenBuffer) para a IR."""
+    kinds, vals = buf.kinds, buf.vals
+    ir = []
+    for stmt in statements:
+        start, end = stmt['start'], stmt['end']
+        label, line = stmt['label'], stmt['line']
+        kw = vals[start]
+        if kw == KW.INPUT:
+            ir.append(InputStmt(label, line, vals[start+1]))
+        elif kw == KW.PRINT:
+            ir.append(PrintStmt(label, line, vals[start+1]))
+        elif kw == KW.LET:
+            ir.append(LetStmt(label, line, vals[start+1], decode_expr(buf, start+3, end)))
+        elif kw == KW.GOTO:
+            ir.append(GotoStmt(label, line, vals[start+1]))
+        elif kw == KW.IF:
+            relop = next(p for p in range(start+1, end) if kinds[p] == TK.RELOP)
+            ir.append(IfGotoStmt(label, line, decode_expr(buf, start+1, relop), vals[relop],
+                                 decode_expr(buf, relop+1, end-2), vals[end-1]))
+        else:
+            ir.append(EndStmt(label, line))
+    return ir
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # GERADOR DE CÓDIGO SML OTIMIZADO
 # ═══════════════════════════════════════════════════════════════════════════
 
+class MemoryOverflowError(Exception):
+    """Programa não cabe nas 100 palavras do Simpletron."""
+
+    def __init__(self, words: int):
+        super().__init__(f"{words} palavras necessárias (máx: 100)")
+        self.words = words
+
+
+# Desvios que _gen_branch_seq emite para cada relação sobre o acumulador
+_BRANCH_SEQ_LEN = {'==': 1, '!=': 3, '<': 1, '<=': 2, '>': 3, '>=': 2}
+
+# a relop b  <=>  b _SWAPPED_RELOP[relop] a
+_SWAPPED_RELOP = {'==': '==', '!=': '!=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+
+
 class SMLGenerator:
     """Gerador de código SML com otimizações agressivas."""
 
+    SCRATCH = 26        # pseudo-variável: destino dos inputs cujo valor nunca é lido
+
     def __init__(self, data: Dict):
-        self.statements = data['statements']
+        self.index = data['index']
+        self.ir = build_ir(data['statements'], data['tokens'])
+        self.cfg = CFG(self.index.kws, self.index.target_idx)
+        self.insns = []       # (op, REF, símbolo ou operando, comentário) antes da montagem
         self.code = []
         self.addr = 0
-        self.vars = {}        # var -> addr
         self.consts = {}      # value -> addr
         self.labels = {}      # label -> addr
-        self.temps = []       # temp addrs
-        self.const_values = {}  # var -> known constant value
-        self.var_last_use = {}  # var -> último statement que usa
-        self.var_usage = {}     # var -> contador de usos
+        self.last_local = 0   # último label local criado (negativo)
+        self.temps = []       # addr por slot de temporário
+        self.relocs = []      # (posição em code, REF, símbolo) a resolver
+        self.peephole_hits = {rule[0]: 0 for rule in PEEPHOLE_RULES}
+        self.branch_hits = {name: 0 for name in BRANCH_RULES}
+        self.acc_hits = {'load': 0, 'store': 0}
+        self.algebraic_hits = {rule[0]: 0 for rule in ALGEBRAIC_RULES}
+        self.reused = 0       # expressões trocadas pela variável que já as contém
+
+        # Tabelas por variável, indexadas por 0-25 (26: SCRATCH)
+        self.var_addr = array('h', [-1] * 27)   # endereço alocado (-1: nenhum)
+        self.var_refs = []                       # variáveis referenciadas, na ordem do primeiro uso
+        self.slots = []                          # variáveis de cada palavra compartilhada
+
+        # Fatos do dataflow, por statement
+        self.consts_at = []                      # {variável: valor} das leituras constantes
+        self.keep_store = bytearray()            # o let/input precisa gravar a variável
+        self.live_out = array('l')               # variáveis vivas na memória após o statement
+        self.live_stmt = bytearray()             # statement executável (os outros não geram código)
+        self.dropped = bytearray()               # let morto removido por inteiro
+        self.hoisted = bytearray()               # let invariante movido para o preheader do laço
+        self.preheaders = {}                     # cabeçalho -> [label local, lets içados, variáveis]
+        self.taken = array('b')                  # if decidido: 1 sempre, 0 nunca, -1 em execução
+        self.pos = 0                             # statement sendo gerado
+        self.here = {}                           # consts_at[pos]
 
     def generate(self) -> List[str]:
         """Gera código SML otimizado."""
@@ -295,10 +824,33 @@ class SMLGenerator:
         self._analyze_dataflow()
 
         # Primeira passagem: código
-        for stmt in self.statements:
-            self.labels[stmt['label']] = self.addr
+        for idx, stmt in enumerate(self.ir):
+            if not self.live_stmt[idx]:
+                continue                # inalcançável: nenhum desvio chega aqui
+            pre = self.preheaders.get(idx)
+            if pre is not None:
+                self.labels[pre[0]] = self.addr
+                for i in pre[1]:
+                    self.pos = i
+                    self.here = self.consts_at[i]
+                    self._gen_stmt(self.ir[i])
+            self.labels[stmt.label] = self.addr
+            if self.dropped[idx] or self.hoisted[idx]:
+                continue
+            self.pos = idx
+            self.here = self.consts_at[idx]
             self._gen_stmt(stmt)
 
+        # Peephole e desvios até o ponto fixo (um habilita o outro), montagem
+        while True:
+            done = sum(self.peephole_hits.values()) + sum(self.branch_hits.values())
+            self.insns = peephole(self.insns, self.labels, self.peephole_hits)
+            self.insns = optimize_branches(self.insns, self.labels, self.branch_hits)
+            if sum(self.peephole_hits.values()) + sum(self.branch_hits.values()) == done:
+                break
+        self.insns = track_accumulator(self.insns, self.labels, self.acc_hits)
+        self._assemble()
+
         # Aloca memória
         self._allocate_memory()
 
@@ -308,401 +860,525 @@ class SMLGenerator:
         return self.code
 
     def _analyze_dataflow(self):
-        """Análise de dataflow para constant propagation e dead code elimination."""
-        # Primeira passagem: detecta constantes e último uso
-        var_definitions = {}  # var -> idx do statement que define
-        var_reads = {}  # var -> lista de statements que leem
-
-        # Detecta loops (backward jumps) e marca statements dentro de loops
-        in_loop = set()
-        label_to_idx = {stmt['label']: idx for idx, stmt in enumerate(self.statements)}
-
-        for idx, stmt in enumerate(self.statements):
-            tokens = stmt['tokens']
-            # Procura por gotos que pulam para trás (loops)
-            for i, t in enumerate(tokens):
-                if t.value == 'goto' and i+1 < len(tokens):
-                    target_label = int(tokens[i+1].value)
-                    if target_label in label_to_idx:
-                        target_idx = label_to_idx[target_label]
-                        # Se goto pula para trás, marca todo o range como loop
-                        if target_idx <= idx:
-                            for loop_idx in range(target_idx, idx + 1):
-                                in_loop.add(loop_idx)
-
-        for idx, stmt in enumerate(self.statements):
-            tokens = stmt['tokens']
-            kw = tokens[0].value
-
-            # Atualiza último uso de variáveis lidas
-            if kw == 'print':
-                var = tokens[1].value
-                self.var_last_use[var] = idx
-                self.var_usage[var] = self.var_usage.get(var, 0) + 1
-                if var not in var_reads:
-                    var_reads[var] = []
-                var_reads[var].append(idx)
-
-            elif kw == 'input':
-                var = tokens[1].value
-                self.const_values[var] = None  # Input invalida constante
-                self.var_last_use[var] = idx
-                self.var_usage[var] = self.var_usage.get(var, 0) + 1
-                var_definitions[var] = idx
-
-            elif kw == 'let':
-                var = tokens[1].value
-                expr = tokens[3:]
-
-                # Marca variáveis usadas na expressão
-                uses_self = False
-                for t in expr:
-                    if t.kind == 'VAR':
-                        if t.value == var:
-                            uses_self = True
-                        self.var_last_use[t.value] = idx
-                        self.var_usage[t.value] = self.var_usage.get(t.value, 0) + 1
-                        if t.value not in var_reads:
-                            var_reads[t.value] = []
-                        var_reads[t.value].append(idx)
-
-                # Tenta propagar constante (mas NÃO se a variável usa ela mesma, foi redefinida, ou está em loop)
-                if uses_self or var in var_definitions or idx in in_loop:
-                    # Variável se automodifica, é redefinida, ou está em loop - invalida constante
-                    self.const_values[var] = None
-                else:
-                    const_val = self._try_eval_constant(expr)
-                    if const_val is not None:
-                        self.const_values[var] = const_val
-                    else:
-                        self.const_values[var] = None
-
-                var_definitions[var] = idx
-                self.var_usage[var] = self.var_usage.get(var, 0) + 1
-
-            elif kw == 'if':
-                # Marca variáveis usadas no if
-                for t in tokens[1:]:
-                    if t.kind == 'VAR':
-                        self.var_last_use[t.value] = idx
-                        self.var_usage[t.value] = self.var_usage.get(t.value, 0) + 1
-                        if t.value not in var_reads:
-                            var_reads[t.value] = []
-                        var_reads[t.value].append(idx)
-
-        # Segunda passagem: determina quais variáveis realmente precisam ser armazenadas
-        self.needs_storage = {}
-        for var in var_definitions.keys():
-            # Variável precisa de storage se:
-            # 1. Recebe input (não é constante conhecida)
-            # 2. É lida mais de uma vez
-            # 3. É lida em um statement não-consecutivo
-            # 4. Não tem valor constante conhecido
-
-            if var not in self.const_values or self.const_values[var] is None:
-                # Não é constante - precisa de storage
-                self.needs_storage[var] = True
-            elif var in var_reads:
-                reads = var_reads[var]
-                def_idx = var_definitions[var]
-
-                # Se tem mais de uma leitura, ou leitura não consecutiva, precisa storage
-                if len(reads) > 1 or (len(reads) == 1 and reads[0] != def_idx + 1):
-                    self.needs_storage[var] = True
-                else:
-                    self.needs_storage[var] = False
-            else:
-                # Nunca é lida - não precisa storage (dead code)
-                self.needs_storage[var] = False
-
-    def _try_eval_constant(self, tokens: List[Token]) -> Optional[int]:
-        """Tenta avaliar expressão como constante."""
-        # Unário: -x
-        if tokens[0].kind == 'MINUS':
-            if len(tokens) >= 2 and tokens[1].kind == 'NUM':
-                return -int(tokens[1].value)
-            elif len(tokens) >= 2 and tokens[1].kind == 'VAR':
-                var = tokens[1].value
-                if var in self.const_values and self.const_values[var] is not None:
-                    return -self.const_values[var]
-            return None
-
-        # Único operando
-        if len(tokens) == 1:
-            if tokens[0].kind == 'NUM':
-                return int(tokens[0].value)
-            elif tokens[0].kind == 'VAR':
-                var = tokens[0].value
-                if var in self.const_values:
-                    return self.const_values[var]
+        """SCCP sobre a SSA e eliminação de stores mortos por liveness.
+
+        A propagação de constantes condicional decide os ifs que podem ser
+        decididos em tempo de compilação; o CFG passa a ser o dobrado, onde os
+        blocos que deixaram de ser executáveis ficam inalcançáveis e não
+        geram código. Um let só grava a variável se ela estiver viva depois
+        dele, contando apenas as leituras que continuam indo à memória. Se o
+        valor está morto e a conta não pode parar o programa, o let inteiro
+        some; as leituras dele deixam de contar e a liveness é refeita até
+        estabilizar (cadeias de lets mortos).
+        """
+        index, ir = self.index, self.ir
+        n = len(ir)
+        ssa = SSA(self.cfg, ir)
+        sccp = SCCP(self.cfg, ssa, ir, index.target_idx)
+        self.taken = sccp.taken
+        cfg = self.cfg = sccp.folded_cfg(index.kws, index.target_idx)
+
+        rpo_num, block_of = cfg.rpo_num, cfg.block_of
+        self.live_stmt = bytearray(1 if rpo_num[block_of[i]] >= 0 else 0 for i in range(n))
+        self.consts_at = [sccp.consts_read(ssa, i) for i in range(n)]
+        rewritten = self._simplify_exprs() | self._reuse_values()
+
+        # Liveness só das leituras que continuam indo à memória
+        use_mask = read_masks(index)
+        for i in range(n):
+            if not self.live_stmt[i]:
+                use_mask[i] = 0
+            elif i in rewritten:
+                use_mask[i] = 0
+                for v in stmt_reads(ir[i]):
+                    use_mask[i] |= 1 << v
+            for v in self.consts_at[i]:
+                use_mask[i] &= ~(1 << v)
+        def_var = def_vars(index)
+        dropped = self.dropped = bytearray(n)
+        while True:
+            live_out = live_variables(cfg, use_mask, def_var)
+            changed = False
+            for i in range(n):
+                stmt = ir[i]
+                if (stmt.kind == KW.LET and self.live_stmt[i] and not dropped[i]
+                        and not live_out[i] >> stmt.var & 1 and not self._may_trap(stmt.expr, i)):
+                    dropped[i] = 1
+                    use_mask[i] = 0
+                    changed = True
+            if not changed:
+                break
+        self.live_out = live_out
+        self.keep_store = bytearray(
+            1 if ir[i].kind in (KW.LET, KW.INPUT) and live_out[i] >> ir[i].var & 1 else 0
+            for i in range(n))
+        self._hoist_invariants(use_mask, def_var)
+
+    def _hoist_invariants(self, use_mask: array, def_var: array):
+        """Move os lets invariantes de cada laço natural para um preheader.
+
+        O preheader é emitido logo antes do cabeçalho e só é executado na
+        entrada do laço: os desvios de fora passam a ir para ele, os de
+        dentro continuam indo ao cabeçalho. Um let v = e (no laço mais
+        interno que o contém) é içado se:
+          - é a única escrita de v no laço (input nunca é içado);
+          - os operandos de e não mudam no laço (ou só mudam por um let já
+            içado antes dele);
+          - v não está vivo na entrada do cabeçalho: toda leitura de v no
+            laço ou depois da saída passa antes pelo let;
+          - e não pode parar o programa, ou o let está no bloco do
+            cabeçalho depois só de lets que também não param (a conta que
+            estoura ou divide por zero continua acontecendo na entrada).
+        Laços em que o statement anterior ao cabeçalho cai nele vindo de
+        dentro do laço ficam como estão. live_out passa a ter as variáveis
+        içadas no laço inteiro (a palavra não pode ser dividida ali).
+        """
+        ir, cfg = self.ir, self.cfg
+        n = len(ir)
+        block_of, start, loop_header = cfg.block_of, cfg.start, cfg.loop_header
+        writes = [i for i in range(n) if self.live_stmt[i] and not self.dropped[i] and def_var[i] >= 0]
+        loop_defs = {}          # cabeçalho -> escritas de cada variável no laço
+        for i in writes:
+            h = loop_header[block_of[i]]
+            while h >= 0:
+                loop_defs.setdefault(h, array('l', [0] * 26))[def_var[i]] += 1
+                h = cfg.loop_parent[h]
+
+        hoisted = self.hoisted = bytearray(n)
+        entries = {}            # cabeçalho -> o laço tem preheader
+        for i in writes:
+            stmt = ir[i]
+            h = loop_header[block_of[i]]
+            if stmt.kind != KW.LET or h < 0 or not self.keep_store[i]:
+                continue
+            if h not in entries:
+                entries[h] = self._has_preheader(h)
+            head = start[h]
+            if not entries[h] or loop_defs[h][stmt.var] != 1:
+                continue
+            if self._live_in(head, use_mask, def_var) >> stmt.var & 1:
+                continue
+            pre = self.preheaders.get(head)
+            inside = pre[2] if pre else 0
+            self.here = self.consts_at[i]
+            expr = stmt.expr
+            operands = ((expr.lk, expr.lv),) if expr.op == Expr.MOV else ((expr.lk, expr.lv), (expr.rk, expr.rv))
+            if any(kind != OPND.NUM and loop_defs[h][v] and not (loop_defs[h][v] == 1 and inside >> v & 1)
+                   for kind, v in (self._known(k, v) for k, v in operands)):
+                continue
+            if self._may_trap(expr) and not (block_of[i] == h and all(
+                    ir[j].kind == KW.LET and (self.dropped[j] or hoisted[j] or not self._may_trap(ir[j].expr, j))
+                    for j in range(head, i))):
+                continue
+            if pre is None:
+                pre = self.preheaders[head] = [self._new_label(), [], 0]
+            pre[1].append(i)
+            pre[2] |= 1 << stmt.var
+            hoisted[i] = 1
+
+        # As variáveis içadas ficam vivas no preheader e no laço inteiro
+        live_out = self.live_out
+        live_in = {head: self._live_in(head, use_mask, def_var) for head in self.preheaders}
+        for head, (_, stmts, mask) in self.preheaders.items():
+            for i in stmts:
+                live_out[i] = live_in[head] | mask
+        for head, (_, _, mask) in self.preheaders.items():
+            h = block_of[head]
+            for i in range(n):
+                if self.live_stmt[i] and not hoisted[i] and cfg.in_loop(block_of[i], h):
+                    live_out[i] |= mask
+
+    def _live_in(self, i: int, use_mask: array, def_var: array) -> int:
+        """Variáveis vivas antes do statement i."""
+        live = self.live_out[i]
+        if def_var[i] >= 0:
+            live &= ~(1 << def_var[i])
+        return live | use_mask[i]
+
+    def _has_preheader(self, h: int) -> bool:
+        """O laço de cabeçalho h pode receber um preheader logo antes dele.
+
+        O statement anterior ao cabeçalho cai nele (não é goto, end ou if
+        sempre tomado) só se estiver fora do laço.
+        """
+        k = self.cfg.start[h] - 1
+        if k < 0 or not self.live_stmt[k]:
+            return True
+        kind = self.ir[k].kind
+        if kind == KW.GOTO or kind == KW.END or kind == KW.IF and self.taken[k] == 1:
+            return True
+        return not self.cfg.in_loop(self.cfg.block_of[k], h)
+
+    def _simplify_exprs(self) -> set:
+        """Reescreve as expressões dos statements executáveis por ALGEBRAIC_RULES.
+
+        Roda depois da SCCP: os operandos de valor conhecido casam com os
+        padrões literais. Retorna os índices dos statements reescritos.
+        """
+        rewritten = set()
+        hits = self.algebraic_hits
+        for i, stmt in enumerate(self.ir):
+            if not self.live_stmt[i] or stmt.kind not in (KW.LET, KW.IF):
+                continue
+            self.here = self.consts_at[i]
+            for attr in (('expr',) if stmt.kind == KW.LET else ('left', 'right')):
+                result = simplify(getattr(stmt, attr), self._operand_value)
+                if result is not None:
+                    hits[result[0]] += 1
+                    setattr(stmt, attr, result[1])
+                    rewritten.add(i)
+        return rewritten
+
+    def _reuse_values(self) -> set:
+        """Troca cada expressão já guardada numa variável pela variável.
+
+        Numeração de valores global: a expressão é reaproveitada se o mesmo
+        valor foi gravado numa variável em todos os caminhos até ela e nem a
+        variável nem os operandos mudaram depois (AvailableExprs). O let
+        reescrito continua gerando o fato da expressão original. Retorna os
+        índices dos statements reescritos.
+        """
+        ir, n = self.ir, len(self.ir)
+        keys = [None] * n
+        for i, stmt in enumerate(ir):
+            if self.live_stmt[i] and stmt.kind == KW.LET:
+                self.here = self.consts_at[i]
+                keys[i] = expr_key(stmt.expr, self._operand_value)
+        avail = AvailableExprs(self.cfg, keys, def_vars(self.index))
+
+        rewritten = set()
+        for i, stmt in enumerate(ir):
+            if not self.live_stmt[i] or not (stmt.kind == KW.LET or stmt.kind == KW.IF and self.taken[i] < 0):
+                continue
+            self.here = self.consts_at[i]
+            for attr in (('expr',) if stmt.kind == KW.LET else ('left', 'right')):
+                v = avail.holder(expr_key(getattr(stmt, attr), self._operand_value), i)
+                if v >= 0:
+                    setattr(stmt, attr, Expr(Expr.MOV, OPND.VAR, v))
+                    self.reused += 1
+                    rewritten.add(i)
+        return rewritten
+
+    def removed_labels(self) -> List[int]:
+        """Labels dos statements inalcançáveis (removidos antes da geração)."""
+        return [stmt.label for stmt, live in zip(self.ir, self.live_stmt) if not live]
+
+    def _may_trap(self, expr: Expr, idx: int = -1) -> bool:
+        """A expressão pode parar o programa (estouro da palavra ou divisão por zero).
+
+        Cópias, '-x' e contas de valor conhecido não param; divisão e resto
+        por constante não nula também não (|a / c| <= |a|). idx: statement
+        cujas constantes valem (padrão: as de self.here).
+        """
+        if idx >= 0:
+            self.here = self.consts_at[idx]
+        if expr.op == Expr.MOV or self._try_eval_constant(expr) is not None:
+            return False
+        if expr.op != SML.DIV and expr.op != SML.MOD:
+            return True
+        divisor = self._operand_value(expr.rk, expr.rv)
+        return divisor is None or divisor == 0
+
+    def _operand_value(self, kind: int, value: int) -> Optional[int]:
+        """Valor conhecido do operando (literal ou constante propagada)."""
+        if kind == OPND.NUM:
+            return value
+        known = self.here.get(value)
+        if known is None or kind == OPND.VAR:
+            return known
+        return -known
+
+    def _try_eval_constant(self, expr: Expr) -> Optional[int]:
+        """Tenta avaliar a expressão como constante."""
+        left_val = self._operand_value(expr.lk, expr.lv)
+        if expr.op == Expr.MOV:
+            return left_val
+
+        right_val = self._operand_value(expr.rk, expr.rv)
+        if left_val is None or right_val is None:
             return None
-
-        # Binário: a op b
-        if len(tokens) == 3:
-            left, op, right = tokens[0], tokens[1], tokens[2]
-
-            # Obtém valores
-            left_val = None
-            if left.kind == 'NUM':
-                left_val = int(left.value)
-            elif left.kind == 'VAR' and left.value in self.const_values:
-                left_val = self.const_values[left.value]
-
-            right_val = None
-            if right.kind == 'NUM':
-                right_val = int(right.value)
-            elif right.kind == 'VAR' and right.value in self.const_values:
-                right_val = self.const_values[right.value]
-
-            if left_val is None or right_val is None:
-                return None
-
-            # Avalia
-            if op.value == '+':
-                return left_val + right_val
-            elif op.value == '-':
-                return left_val - right_val
-            elif op.value == '*':
-                return left_val * right_val
-            elif op.value == '/' and right_val != 0:
-                return left_val // right_val
-            elif op.value == '%' and right_val != 0:
-                return left_val % right_val
-
-        return None
+        return fold_op(expr.op, left_val, right_val)
 
     def _emit(self, op: int, operand: int, comment: str = ""):
-        """Emite instrução SML."""
-        word = op * 100 + operand
-        self.code.append({'addr': self.addr, 'word': word, 'comment': comment, 'resolved': operand != 99})
+        """Emite instrução SML com operando absoluto."""
+        self.insns.append((op, REF.NONE, operand, comment))
         self.addr += 1
 
-    def _get_var(self, name: str) -> int:
-        """Obtém endereço de variável."""
-        if name not in self.vars:
-            self.vars[name] = 99  # placeholder
-        return 99
-
-    def _get_const(self, value: int) -> int:
-        """Obtém endereço de constante."""
-        if value not in self.consts:
-            self.consts[value] = 99
-        return 99
+    def _emit_ref(self, op: int, ref: int, sym: int, comment: str):
+        """Emite instrução cujo operando é simbólico (resolvido após a alocação)."""
+        self.insns.append((op, ref, sym, comment))
+        self.addr += 1
 
-    def _get_temp(self) -> int:
-        """Aloca temporário."""
-        self.temps.append(99)
-        return 99
+    def _emit_var(self, op: int, var: int, comment: str):
+        """Emite op sobre uma variável."""
+        self._emit_ref(op, REF.VAR, var, comment)
+
+    def _emit_const(self, op: int, value: int, comment: str):
+        """Emite op sobre uma constante."""
+        self._emit_ref(op, REF.CONST, value, comment)
+
+    def _emit_temp(self, op: int, slot: int, comment: str):
+        """Emite op sobre um slot de temporário."""
+        self._emit_ref(op, REF.TEMP, slot, comment)
+
+    def _new_label(self) -> int:
+        """Label local (negativo, nunca colide com os labels SIMPLE)."""
+        self.last_local -= 1
+        return self.last_local
+
+    def _assemble(self):
+        """Palavras e tabela de relocação a partir das instruções finais.
+
+        Variáveis, constantes e temporários são recontados aqui: o peephole
+        pode ter eliminado todas as referências a algum deles.
+        """
+        code, relocs, var_refs = self.code, self.relocs, self.var_refs
+        temps = -1
+        for pos, (op, ref, sym, comment) in enumerate(self.insns):
+            if ref == REF.NONE:
+                code.append({'addr': pos, 'word': op * 100 + sym, 'comment': comment})
+                continue
+            code.append({'addr': pos, 'word': op * 100, 'comment': comment})
+            relocs.append((pos, ref, sym))
+            if ref == REF.VAR:
+                if sym not in var_refs:
+                    var_refs.append(sym)
+            elif ref == REF.CONST:
+                self.consts[sym] = None
+            elif ref == REF.TEMP:
+                temps = max(temps, sym)
+        self.temps = [None] * (temps + 1)
+        self.addr = len(code)
+
+    def _emit_operand(self, op: int, kind: int, value: int):
+        """Emite op sobre um literal (constante) ou uma variável."""
+        if kind == OPND.NUM:
+            self._emit_const(op, value, f"{MNEMONIC[op]} {value}")
+        else:
+            self._emit_var(op, value, f"{MNEMONIC[op]} {VAR_NAMES[value]}")
 
-    def _gen_stmt(self, stmt: Dict):
+    def _gen_stmt(self, stmt: Stmt):
         """Gera código para statement."""
-        tokens = stmt['tokens']
-        kw = tokens[0].value
-
-        if kw == 'input':
-            var = tokens[1].value
-            self._get_var(var)
-            self._emit(SML.READ, 99, f"read {var}")
-
-        elif kw == 'print':
-            var = tokens[1].value
-
-            # Se variável é constante, carrega constante e imprime direto do acumulador
-            if var in self.const_values and self.const_values[var] is not None:
-                const_val = self.const_values[var]
-                self._get_const(const_val)
-                self._emit(SML.LOAD, 99, f"load {const_val}")
-                # Usa um temporário para imprimir
-                temp = self._get_temp()
-                self._emit(SML.STORE, 99, f"store temp")
-                self._emit(SML.WRITE, 99, f"write temp")
+        kind = stmt.kind
+
+        if kind == KW.INPUT:
+            # O valor precisa ser consumido mesmo se nunca for lido
+            var = stmt.var if self.keep_store[self.pos] else self.SCRATCH
+            self._emit_var(SML.READ, var, f"read {VAR_NAMES[stmt.var]}")
+
+        elif kind == KW.PRINT:
+            const_val = self.here.get(stmt.var)
+
+            # Se variável é constante, imprime direto a palavra da constante
+            if const_val is not None:
+                self._emit_const(SML.WRITE, const_val, f"write {const_val}")
             else:
-                self._get_var(var)
-                self._emit(SML.WRITE, 99, f"write {var}")
+                self._emit_var(SML.WRITE, stmt.var, f"write {VAR_NAMES[stmt.var]}")
 
-        elif kw == 'let':
-            var = tokens[1].value
-            self._gen_expr(tokens[3:])
+        elif kind == KW.LET:
+            self._gen_expr(stmt.expr)
 
-            # Só gera STORE se a variável precisa de storage
-            if self.needs_storage.get(var, True):
-                self._get_var(var)
-                self._emit(SML.STORE, 99, f"store {var}")
+            # Só gera STORE se a variável está viva depois do let
+            if self.keep_store[self.pos]:
+                self._emit_var(SML.STORE, stmt.var, f"store {VAR_NAMES[stmt.var]}")
 
-        elif kw == 'goto':
-            target = int(tokens[1].value)
-            self._emit(SML.BRANCH, 99, f"goto {target}")
+        elif kind == KW.GOTO:
+            self._emit_ref(SML.BRANCH, REF.LABEL, self._branch_target(stmt), f"goto {stmt.target}")
 
-        elif kw == 'if':
-            self._gen_if(tokens, stmt['label'])
+        elif kind == KW.IF:
+            taken = self.taken[self.pos]
+            if taken < 0:
+                self._gen_if(stmt)
+            elif taken:
+                self._emit_ref(SML.BRANCH, REF.LABEL, self._branch_target(stmt), f"goto {stmt.target}")
 
-        elif kw == 'end':
+        elif kind == KW.END:
             self._emit(SML.HALT, 0, "halt")
 
-    def _gen_expr(self, tokens: List[Token]):
+    def _branch_target(self, stmt: Stmt) -> int:
+        """Label do desvio: entrando de fora num laço com preheader, o do preheader."""
+        head = self.index.target_idx[self.pos]
+        pre = self.preheaders.get(head)
+        if pre is None or self.cfg.in_loop(self.cfg.block_of[self.pos], self.cfg.block_of[head]):
+            return stmt.target
+        return pre[0]
+
+    def _known(self, kind: int, value: int) -> Tuple[int, int]:
+        """Substitui variável de valor conhecido pelo literal correspondente."""
+        if kind != OPND.NUM:
+            known = self._operand_value(kind, value)
+            if known is not None:
+                return OPND.NUM, known
+        return kind, value
+
+    def _gen_expr(self, expr: Expr):
         """Gera código para expressão (resultado no acumulador)."""
         # Tenta avaliar como constante primeiro
-        const_val = self._try_eval_constant(tokens)
+        const_val = self._try_eval_constant(expr)
         if const_val is not None:
             # Expressão é constante - carrega diretamente
-            self._get_const(const_val)
-            self._emit(SML.LOAD, 99, f"load {const_val}")
+            self._emit_operand(SML.LOAD, OPND.NUM, const_val)
             return
 
-        # Unário: -x
-        if tokens[0].kind == 'MINUS':
-            operand = tokens[1]
-            self._get_const(0)
-            self._emit(SML.LOAD, 99, "load 0")
-
-            if operand.kind == 'NUM':
-                self._get_const(int(operand.value))
-                self._emit(SML.SUB, 99, f"sub {operand.value}")
-            else:
-                # Tenta substituir por constante
-                if operand.value in self.const_values and self.const_values[operand.value] is not None:
-                    val = self.const_values[operand.value]
-                    self._get_const(val)
-                    self._emit(SML.SUB, 99, f"sub {val}")
-                else:
-                    self._get_var(operand.value)
-                    self._emit(SML.SUB, 99, f"sub {operand.value}")
-            return
+        lk, lv = self._known(expr.lk, expr.lv)
 
-        # Único operando
-        if len(tokens) == 1:
-            t = tokens[0]
-            if t.kind == 'NUM':
-                self._get_const(int(t.value))
-                self._emit(SML.LOAD, 99, f"load {t.value}")
+        # Único operando ('-x' vira 0 - x)
+        if expr.op == Expr.MOV:
+            if lk == OPND.NEG:
+                self._emit_operand(SML.LOAD, OPND.NUM, 0)
+                self._emit_operand(SML.SUB, OPND.VAR, lv)
             else:
-                # Tenta substituir por constante
-                if t.value in self.const_values and self.const_values[t.value] is not None:
-                    val = self.const_values[t.value]
-                    self._get_const(val)
-                    self._emit(SML.LOAD, 99, f"load {val}")
-                else:
-                    self._get_var(t.value)
-                    self._emit(SML.LOAD, 99, f"load {t.value}")
+                self._emit_operand(SML.LOAD, lk, lv)
             return
 
-        # Binário: a op b
-        left, op, right = tokens[0], tokens[1], tokens[2]
-
-        # Carrega left (tenta usar constante se possível)
-        if left.kind == 'NUM':
-            self._get_const(int(left.value))
-            self._emit(SML.LOAD, 99, f"load {left.value}")
-        elif left.value in self.const_values and self.const_values[left.value] is not None:
-            val = self.const_values[left.value]
-            self._get_const(val)
-            self._emit(SML.LOAD, 99, f"load {val}")
+        # Binário: a op b. Operandos negados são absorvidos pela operação:
+        # a + -b = a - b; -a * b = (0 - a) * b; e, com divisão e resto
+        # truncados do Simpletron, a / -b = -a / b e a % -b = a % b.
+        rk, rv = self._known(expr.rk, expr.rv)
+        op = expr.op
+        neg_left, neg_right = lk == OPND.NEG, rk == OPND.NEG
+        if op in (SML.ADD, SML.SUB):
+            negate_left = neg_left
+            if neg_right:
+                op = SML.SUB if op == SML.ADD else SML.ADD
+        elif op in (SML.MUL, SML.DIV):
+            negate_left = neg_left != neg_right
+        else:
+            negate_left = neg_left
+        if rk == OPND.NEG:
+            rk = OPND.VAR
+
+        # Carrega left (negado se preciso)
+        if lk == OPND.NUM:
+            self._emit_operand(SML.LOAD, OPND.NUM, -lv if negate_left else lv)
+        elif negate_left:
+            self._emit_operand(SML.LOAD, OPND.NUM, 0)
+            self._emit_operand(SML.SUB, OPND.VAR, lv)
         else:
-            self._get_var(left.value)
-            self._emit(SML.LOAD, 99, f"load {left.value}")
-
-        # Opera com right (tenta usar constante se possível)
-        if right.kind == 'NUM':
-            self._get_const(int(right.value))
-            rval = right.value
-        elif right.value in self.const_values and self.const_values[right.value] is not None:
-            val = self.const_values[right.value]
-            self._get_const(val)
-            rval = str(val)
+            self._emit_operand(SML.LOAD, OPND.VAR, lv)
+
+        # Opera com right
+        self._emit_operand(op, rk, rv)
+
+    def _gen_if(self, stmt: IfGotoStmt):
+        """Gera código para if/goto: acc = x - y e a sequência de desvios mais curta.
+
+        Com um lado simples (literal ou variável), o outro é avaliado direto
+        no acumulador e o simples entra como SUB (ou ADD, se for '-x'); contra
+        0 não há SUB. Os lados podem ser trocados (a > b é b < a) para cair
+        numa relação barata: < e == custam um desvio, <= e >= dois, > e !=
+        três. Com os dois lados compostos, o esquerdo vai para o único
+        temporário e o direito é avaliado depois, como no fonte.
+        """
+        relop = RELOPS[stmt.relop]
+        left, right = stmt.left, stmt.right
+        simple_left, simple_right = self._simple_operand(left), self._simple_operand(right)
+
+        # Candidatos: (custo, relação sobre o acumulador, lado avaliado, operando subtraído)
+        candidates = []
+        if simple_right is not None:
+            cost = self._expr_len(left) + (simple_right != (OPND.NUM, 0))
+            candidates.append((cost + _BRANCH_SEQ_LEN[relop], relop, left, simple_right))
+        if simple_left is not None:
+            cost = self._expr_len(right) + (simple_left != (OPND.NUM, 0))
+            swapped = _SWAPPED_RELOP[relop]
+            candidates.append((cost + _BRANCH_SEQ_LEN[swapped], swapped, right, simple_left))
+        if candidates:
+            _, relop, expr, (kind, value) = min(candidates, key=lambda c: c[0])
+            self._gen_expr(expr)
+            if kind == OPND.NEG:
+                self._emit_operand(SML.ADD, OPND.VAR, value)
+            elif (kind, value) != (OPND.NUM, 0):
+                self._emit_operand(SML.SUB, kind, value)
         else:
-            self._get_var(right.value)
-            rval = right.value
-
-        op_map = {'+': SML.ADD, '-': SML.SUB, '*': SML.MUL, '/': SML.DIV, '%': SML.MOD}
-        op_name = {'+': 'add', '-': 'sub', '*': 'mul', '/': 'div', '%': 'mod'}
-        self._emit(op_map[op.value], 99, f"{op_name[op.value]} {rval}")
-
-    def _gen_if(self, tokens: List[Token], label: int):
-        """Gera código para if/goto (OTIMIZADO)."""
-        # Encontra RELOP
-        relop_idx = next(i for i, t in enumerate(tokens) if t.kind == 'RELOP')
-        goto_idx = next(i for i, t in enumerate(tokens) if t.value == 'goto')
-
-        left_tokens = tokens[1:relop_idx]
-        relop = tokens[relop_idx].value
-        right_tokens = tokens[relop_idx+1:goto_idx]
-        target = int(tokens[goto_idx+1].value)
-
-        # Avalia left
-        self._gen_expr(left_tokens)
-        temp = self._get_temp()
-        self._emit(SML.STORE, 99, "store temp_left")
-
-        # Avalia right
-        self._gen_expr(right_tokens)
-        temp = self._get_temp()
-        self._emit(SML.STORE, 99, "store temp_right")
-
-        # Carrega left e subtrai right (acc = left - right)
-        self._emit(SML.LOAD, 99, "load temp_left")
-        self._emit(SML.SUB, 99, "sub temp_right")
-
-        # Branch otimizado baseado no operador
+            # acc = right - left, avaliando left primeiro
+            self._gen_expr(left)
+            self._emit_temp(SML.STORE, 0, "store temp_left")
+            self._gen_expr(right)
+            self._emit_temp(SML.SUB, 0, "sub temp_left")
+            relop = _SWAPPED_RELOP[relop]
+
+        self._gen_branch_seq(relop, stmt.target, self._branch_target(stmt))
+
+    def _simple_operand(self, expr: Expr) -> Optional[Tuple[int, int]]:
+        """(OPND, valor) se a expressão é um operando simples ou constante; senão None."""
+        const_val = self._try_eval_constant(expr)
+        if const_val is not None:
+            return OPND.NUM, const_val
+        if expr.op == Expr.MOV:
+            return self._known(expr.lk, expr.lv)
+        return None
+
+    def _expr_len(self, expr: Expr) -> int:
+        """Número de instruções que _gen_expr emitiria para a expressão."""
+        mark = len(self.insns)
+        self._gen_expr(expr)
+        emitted = len(self.insns) - mark
+        del self.insns[mark:]
+        self.addr -= emitted
+        return emitted
+
+    def _gen_branch_seq(self, relop: str, target: int, dest: int):
+        """Desvia para dest se 'acc relop 0' (target só aparece nos comentários)."""
         if relop == '==':
-            self._emit(SML.BRANCHZERO, 99, f"if == goto {target}")
+            self._emit_ref(SML.BRANCHZERO, REF.LABEL, dest, f"if == goto {target}")
 
         elif relop == '!=':
             # Se zero, pula; senão, vai
-            skip = self.addr + 2
-            self._emit(SML.BRANCHZERO, skip, "if == skip")
-            self._emit(SML.BRANCH, 99, f"goto {target}")
+            skip = self._new_label()
+            self._emit_ref(SML.BRANCHZERO, REF.LABEL, skip, "if == skip")
+            self._emit_ref(SML.BRANCH, REF.LABEL, dest, f"goto {target}")
+            self.labels[skip] = self.addr
 
         elif relop == '<':
-            self._emit(SML.BRANCHNEG, 99, f"if < goto {target}")
+            self._emit_ref(SML.BRANCHNEG, REF.LABEL, dest, f"if < goto {target}")
 
         elif relop == '<=':
             # Se neg ou zero, vai
-            self._emit(SML.BRANCHNEG, 99, f"if < goto {target}")
-            self._emit(SML.BRANCHZERO, 99, f"if == goto {target}")
+            self._emit_ref(SML.BRANCHNEG, REF.LABEL, dest, f"if < goto {target}")
+            self._emit_ref(SML.BRANCHZERO, REF.LABEL, dest, f"if == goto {target}")
 
         elif relop == '>':
             # Se não neg e não zero, vai
-            skip = self.addr + 3
-            self._emit(SML.BRANCHNEG, skip, "if < skip")
-            self._emit(SML.BRANCHZERO, skip, "if == skip")
-            self._emit(SML.BRANCH, 99, f"goto {target}")
+            skip = self._new_label()
+            self._emit_ref(SML.BRANCHNEG, REF.LABEL, skip, "if < skip")
+            self._emit_ref(SML.BRANCHZERO, REF.LABEL, skip, "if == skip")
+            self._emit_ref(SML.BRANCH, REF.LABEL, dest, f"goto {target}")
+            self.labels[skip] = self.addr
 
         elif relop == '>=':
             # Se não neg, vai
-            skip = self.addr + 2
-            self._emit(SML.BRANCHNEG, skip, "if < skip")
-            self._emit(SML.BRANCH, 99, f"goto {target}")
+            skip = self._new_label()
+            self._emit_ref(SML.BRANCHNEG, REF.LABEL, skip, "if < skip")
+            self._emit_ref(SML.BRANCH, REF.LABEL, dest, f"goto {target}")
+            self.labels[skip] = self.addr
 
     def _allocate_memory(self):
         """Aloca variáveis, constantes e temporários (OTIMIZADO)."""
         data_start = self.addr
 
-        # Filtra variáveis que realmente precisam ser alocadas
-        # usando a análise de needs_storage
-        vars_to_allocate = {}
-        for var in self.vars.keys():
-            # Aloca apenas se precisa de storage ou não foi analisada
-            if self.needs_storage.get(var, True):
-                vars_to_allocate[var] = data_start
-                self.code.append({'addr': data_start, 'word': 0, 'comment': f"var {var}", 'resolved': True})
-                data_start += 1
-
-        self.vars = vars_to_allocate
-
-        # Temporários (reutiliza slots)
-        temp_addr = data_start
-        for i in range(min(len(self.temps), 2)):  # Máximo 2 temporários
-            self.temps[i] = temp_addr
-            self.code.append({'addr': temp_addr, 'word': 0, 'comment': f"temp", 'resolved': True})
-            temp_addr += 1
-        data_start = temp_addr
+        # Só variáveis referenciadas pelo código emitido (leituras constantes
+        # e STOREs mortos não geram referência); variáveis que nunca estão
+        # vivas ao mesmo tempo dividem a palavra
+        for slot in self._color_vars():
+            for v in slot:
+                self.var_addr[v] = data_start
+            names = ",".join('descarte' if v == self.SCRATCH else VAR_NAMES[v] for v in slot)
+            self.code.append({'addr': data_start, 'word': 0, 'comment': f"var {names}"})
+            data_start += 1
+
+        # Temporários (no máximo 1 slot, reutilizado por todos os ifs)
+        for slot in range(len(self.temps)):
+            self.temps[slot] = data_start
+            self.code.append({'addr': data_start, 'word': 0, 'comment': "temp"})
+            data_start += 1
 
         # Constantes (compartilha valores duplicados)
         const_map = {}  # valor -> endereço
         for val in sorted(set(self.consts.keys())):
             if val not in const_map:
                 const_map[val] = data_start
-                self.code.append({'addr': data_start, 'word': val, 'comment': f"const {val}", 'resolved': True})
+                self.code.append({'addr': data_start, 'word': val, 'comment': f"const {val}"})
                 data_start += 1
 
         # Atualiza todas as referências para o mesmo endereço
@@ -711,177 +1387,592 @@ class SMLGenerator:
 
         # Verificação de overflow
         if data_start > 99:
-            print(f"✗ MEMORY OVERFLOW: {data_start} palavras necessárias (máx: 100)")
-            sys.exit(1)
+            raise MemoryOverflowError(data_start)
+
+    def _color_vars(self) -> List[List[int]]:
+        """Coloração gulosa do grafo de interferência das variáveis.
+
+        Uma escrita na memória (STORE de let ou READ de input) interfere com
+        toda variável viva depois dela: as duas não podem dividir a palavra.
+        Variáveis vivas só com o valor inicial 0 podem dividir, porque a
+        palavra só muda numa escrita. Colore por grau decrescente (empate:
+        ordem do primeiro uso) e retorna as variáveis de cada palavra.
+        """
+        interferes = [0] * 27
+        for i, stmt in enumerate(self.ir):
+            if not self.live_stmt[i] or stmt.kind not in (KW.LET, KW.INPUT):
+                continue
+            if self.keep_store[i]:
+                v = stmt.var
+            elif stmt.kind == KW.INPUT:
+                v = self.SCRATCH
+            else:
+                continue
+            live = self.live_out[i] & ~(1 << v)
+            interferes[v] |= live
+            while live:
+                low = live & -live
+                interferes[low.bit_length() - 1] |= 1 << v
+                live ^= low
+
+        first = {v: k for k, v in enumerate(self.var_refs)}
+        color = {}
+        slots = []
+        for v in sorted(self.var_refs, key=lambda v: (-bin(interferes[v]).count('1'), first[v])):
+            used = {color[u] for u in color if interferes[v] >> u & 1}
+            c = next(c for c in range(len(slots) + 1) if c not in used)
+            if c == len(slots):
+                slots.append([])
+            slots[c].append(v)
+            color[v] = c
+        for slot in slots:
+            slot.sort(key=first.get)
+        slots.sort(key=lambda slot: first[slot[0]])
+        self.slots = slots
+        return slots
 
     def _resolve_addresses(self):
-        """Resolve placeholders (99) para endereços reais."""
-        for instr in self.code:
-            if instr['resolved']:
-                continue
+        """Backpatch: uma passada pela tabela de relocação."""
+        code, var_addr, consts, temps, labels = self.code, self.var_addr, self.consts, self.temps, self.labels
+        for pos, ref, sym in self.relocs:
+            if ref == REF.VAR:
+                addr = var_addr[sym]
+            elif ref == REF.CONST:
+                addr = consts[sym]
+            elif ref == REF.TEMP:
+                addr = temps[sym]
+            else:
+                addr = labels[sym]
+            code[pos]['word'] += addr
 
-            word = instr['word']
-            opcode = word // 100
-            comment = instr['comment']
-            addr = 0
-
-            # READ/WRITE: busca variável ou temporário
-            if opcode in (SML.READ, SML.WRITE):
-                parts = comment.split()
-                if len(parts) >= 2:
-                    var_name = parts[1]
-                    if var_name == 'temp':
-                        addr = self.temps[0] if self.temps else 0
-                    else:
-                        addr = self.vars.get(var_name, 0)
-
-            # STORE: busca variável ou temporário
-            elif opcode == SML.STORE:
-                if 'temp' in comment:
-                    if 'left' in comment:
-                        addr = self.temps[0] if self.temps else 0
-                    elif 'right' in comment:
-                        addr = self.temps[1] if len(self.temps) > 1 else self.temps[0] if self.temps else 0
-                    else:
-                        addr = self.temps[0] if self.temps else 0
-                else:
-                    parts = comment.split()
-                    if len(parts) >= 2:
-                        var_name = parts[1]
-                        addr = self.vars.get(var_name, 0)
-
-            # LOAD: busca variável, constante ou temporário
-            elif opcode == SML.LOAD:
-                if 'temp' in comment:
-                    if 'left' in comment:
-                        addr = self.temps[0] if self.temps else 0
-                    elif 'right' in comment:
-                        addr = self.temps[1] if len(self.temps) > 1 else self.temps[0] if self.temps else 0
-                    else:
-                        addr = self.temps[0] if self.temps else 0
-                else:
-                    parts = comment.split()
-                    if len(parts) >= 2:
-                        name = parts[1]
-                        if name.lstrip('-').isdigit():
-                            val = int(name)
-                            addr = self.consts.get(val, 0)
-                        else:
-                            addr = self.vars.get(name, 0)
-
-            # Operações aritméticas: busca variável, constante ou temp
-            elif opcode in (SML.ADD, SML.SUB, SML.MUL, SML.DIV, SML.MOD):
-                if 'temp' in comment:
-                    if 'left' in comment:
-                        addr = self.temps[0] if self.temps else 0
-                    elif 'right' in comment:
-                        addr = self.temps[1] if len(self.temps) > 1 else self.temps[0] if self.temps else 0
-                    else:
-                        addr = self.temps[0] if self.temps else 0
-                else:
-                    parts = comment.split()
-                    if len(parts) >= 2:
-                        name = parts[1]
-                        if name.lstrip('-').isdigit():
-                            val = int(name)
-                            addr = self.consts.get(val, 0)
-                        else:
-                            addr = self.vars.get(name, 0)
-
-            # BRANCH: busca label
-            elif opcode in (SML.BRANCH, SML.BRANCHNEG, SML.BRANCHZERO):
-                if 'skip' in comment:
-                    addr = word % 100  # Já está resolvido
-                else:
-                    parts = comment.split()
-                    for part in parts:
-                        if part.isdigit():
-                            target_label = int(part)
-                            addr = self.labels.get(target_label, word % 100)
-                            break
 
-            instr['word'] = opcode * 100 + addr
-            instr['resolved'] = True
+# ═══════════════════════════════════════════════════════════════════════════
+# MODO STREAMING (MEMÓRIA LIMITADA)
+# ═══════════════════════════════════════════════════════════════════════════
+
+class StreamChecker:
+    """Análise semântica incremental: um statement por vez, sem reter o programa.
+
+    Guarda os labels já vistos (um conjunto: a memória é O(labels), não
+    O(statements)) e os gotos cujo destino ainda não apareceu. Como no
+    Analyzer, um label fora de ordem continua sendo um destino válido, então
+    os gotos pendentes só são dados como inexistentes em finish().
+    """
+
+    def __init__(self, buf: TokenBuffer):
+        self.buf = buf
+        self.labels = set()         # labels já vistos
+        self.prev = None            # label do statement anterior
+        self.pending = {}           # destino -> [(line, col, text)] dos gotos ainda não resolvidos
+        self.end = None             # (line, text) do primeiro 'end'
+        self.end_reported = False
+        self.multi_end_reported = False
+
+    def check(self, stmt: Dict) -> List[Error]:
+        """Valida um statement contra o que já foi visto."""
+        errors = []
+        label, line, text = stmt['label'], stmt['line'], stmt['text']
+        start, end = stmt['start'], stmt['end']
+        buf = self.buf
+
+        # 'end' deve ser último
+        if self.end is not None and not self.end_reported:
+            errors.append(Error('semantic', "'end' deve ser último", self.end[0], 1, self.end[1]))
+            self.end_reported = True
+
+        # Labels crescentes e únicos
+        if self.prev is not None and label <= self.prev:
+            errors.append(Error('semantic', f"label {label} não cresce após {self.prev}", line, 1, text))
+        if label in self.labels:
+            errors.append(Error('semantic', f"label {label} duplicado", line, 1, text))
+        else:
+            self.labels.add(label)
+            self.pending.pop(label, None)
+        self.prev = label
+
+        # Gotos válidos: um destino ainda não visto pode aparecer depois
+        p = find_goto(buf, start, end)
+        if p >= 0 and p+1 < end:
+            target = buf.vals[p+1]
+            if target not in self.labels:
+                self.pending.setdefault(target, []).append((line, buf.cols[p], text))
+
+        # End único (com mais de um, todos são reportados)
+        if buf.kinds[start] == TK.KW and buf.vals[start] == KW.END:
+            if self.end is None:
+                self.end = (line, text)
+            else:
+                if not self.multi_end_reported:
+                    errors.append(Error('semantic', "múltiplos 'end'", self.end[0], 1, self.end[1]))
+                    self.multi_end_reported = True
+                errors.append(Error('semantic', "múltiplos 'end'", line, 1, text))
+
+        return errors
+
+    def finish(self) -> List[Error]:
+        """Reporta os gotos cujo destino nunca apareceu, na ordem do fonte."""
+        refs = sorted((ref + (target,) for target, refs in self.pending.items() for ref in refs),
+                      key=lambda ref: ref[0])
+        self.pending.clear()
+        return [Error('semantic', f"goto para label inexistente: {target}", line, col, text)
+                for line, col, text, target in refs]
+
+
+def analyze_stream(path: str, scanner: Scanner) -> Iterator[Union[Error, Dict]]:
+    """Análise em streaming: produz erros e statements válidos à medida que lê.
+
+    Os tokens de cada statement ficam em scanner.buf apenas até o consumidor
+    pedir o próximo item. Os erros léxicos e sintáticos saem na hora; os
+    semânticos ficam retidos até o fim e, como em analyze_lines(), só são
+    reportados se não houver nenhum erro léxico ou sintático.
+    """
+    checker = StreamChecker(scanner.buf)
+    semantic = []
+    syntax_ok = True
+    for i, raw in read_lines(path):
+        stmt, errors = _analyze_line(scanner, i, raw)
+        if errors:
+            syntax_ok = False
+            yield from errors
+        if stmt is not None:
+            if syntax_ok:
+                semantic.extend(checker.check(stmt))
+            yield stmt
+            scanner.buf.truncate(0)
+    if syntax_ok:
+        yield from semantic
+        yield from checker.finish()
+
+
+class StreamGenerator:
+    """Gerador SML de passada única com backpatching.
+
+    O código cresce a partir do endereço 0 e os dados (variáveis, constantes e
+    temporários) do endereço 99 para baixo, de modo que todo endereço de dado é
+    conhecido no primeiro uso. Só os desvios para frente ficam pendentes.
+    Não aplica as otimizações globais do SMLGenerator.
+    """
+
+    def __init__(self, buf: TokenBuffer):
+        self.buf = buf
+        self.words = [0] * 100
+        self.addr = 0
+        self.data = 100          # início da área de dados (cresce para baixo)
+        self.slots = {}          # ('var', nome) | ('const', valor) | ('temp', n) -> addr
+        self.labels = {}         # label -> addr
+        self.forward = {}        # label -> [addrs de desvios pendentes]
+        self.overflow = False
+
+    def _slot(self, key: Tuple, init: int = 0) -> int:
+        """Endereço de dado, alocado no primeiro uso."""
+        addr = self.slots.get(key)
+        if addr is None:
+            self.data -= 1
+            addr = self.slots[key] = self.data
+            if self.data < self.addr:
+                self.overflow = True
+            else:
+                self.words[addr] = init
+        return addr
+
+    def _emit(self, op: int, operand: int):
+        if self.addr >= self.data:
+            self.overflow = True
+            return
+        self.words[self.addr] = op * 100 + operand
+        self.addr += 1
+
+    def _emit_branch(self, op: int, target: int):
+        """Emite desvio para label; para frente fica pendente até o label surgir."""
+        if target in self.labels:
+            self._emit(op, self.labels[target])
+        else:
+            self.forward.setdefault(target, []).append(self.addr)
+            self._emit(op, 0)
+
+    def _operand(self, p: int) -> int:
+        """Endereço do operando na posição p; '-x' é materializado no temporário 2."""
+        kinds, vals = self.buf.kinds, self.buf.vals
+        if kinds[p] == TK.MINUS:
+            if kinds[p+1] == TK.NUM:
+                return self._slot(('const', -vals[p+1]), -vals[p+1])
+            temp = self._slot(('temp', 2))
+            self._emit(SML.LOAD, self._slot(('const', 0), 0))
+            self._emit(SML.SUB, self._slot(('var', vals[p+1])))
+            self._emit(SML.STORE, temp)
+            return temp
+        if kinds[p] == TK.NUM:
+            return self._slot(('const', vals[p]), vals[p])
+        return self._slot(('var', vals[p]))
+
+    def _gen_expr(self, p: int, end: int):
+        """Gera expressão (tokens p..end) deixando o resultado no acumulador."""
+        kinds, vals = self.buf.kinds, self.buf.vals
+        op_pos = p + 2 if kinds[p] == TK.MINUS else p + 1
+        right = None
+        if op_pos < end:
+            # Operando direito negado é materializado antes de carregar o esquerdo
+            right = self._operand(op_pos + 1)
+
+        if kinds[p] == TK.MINUS and kinds[p+1] == TK.VAR:
+            self._emit(SML.LOAD, self._slot(('const', 0), 0))
+            self._emit(SML.SUB, self._slot(('var', vals[p+1])))
+        else:
+            self._emit(SML.LOAD, self._operand(p))
+
+        if right is not None:
+            op_map = {TK.PLUS: SML.ADD, TK.MINUS: SML.SUB, TK.MUL: SML.MUL, TK.DIV: SML.DIV, TK.MOD: SML.MOD}
+            self._emit(op_map[kinds[op_pos]], right)
+
+    def feed(self, stmt: Dict):
+        """Gera o código de um statement."""
+        if self.overflow:
+            return
+        kinds, vals = self.buf.kinds, self.buf.vals
+        start, end = stmt['start'], stmt['end']
+        kw = vals[start]
+        label = stmt['label']
+
+        self.labels[label] = self.addr
+        for addr in self.forward.pop(label, ()):
+            self.words[addr] = self.words[addr] // 100 * 100 + self.addr
+
+        if kw == KW.INPUT:
+            self._emit(SML.READ, self._slot(('var', vals[start+1])))
+        elif kw == KW.PRINT:
+            self._emit(SML.WRITE, self._slot(('var', vals[start+1])))
+        elif kw == KW.LET:
+            self._gen_expr(start+3, end)
+            self._emit(SML.STORE, self._slot(('var', vals[start+1])))
+        elif kw == KW.GOTO:
+            self._emit_branch(SML.BRANCH, vals[start+1])
+        elif kw == KW.END:
+            self._emit(SML.HALT, 0)
+        elif kw == KW.IF:
+            relop_idx = next(i for i in range(start, end) if kinds[i] == TK.RELOP)
+            goto_idx = find_goto(self.buf, start, end)
+            relop = RELOPS[vals[relop_idx]]
+            target = vals[goto_idx+1]
+            temp_left, temp_right = self._slot(('temp', 0)), self._slot(('temp', 1))
+
+            self._gen_expr(start+1, relop_idx)
+            self._emit(SML.STORE, temp_left)
+            self._gen_expr(relop_idx+1, goto_idx)
+            self._emit(SML.STORE, temp_right)
+            self._emit(SML.LOAD, temp_left)
+            self._emit(SML.SUB, temp_right)
+
+            if relop == '==':
+                self._emit_branch(SML.BRANCHZERO, target)
+            elif relop == '!=':
+                self._emit(SML.BRANCHZERO, self.addr + 2)
+                self._emit_branch(SML.BRANCH, target)
+            elif relop == '<':
+                self._emit_branch(SML.BRANCHNEG, target)
+            elif relop == '<=':
+                self._emit_branch(SML.BRANCHNEG, target)
+                self._emit_branch(SML.BRANCHZERO, target)
+            elif relop == '>':
+                self._emit(SML.BRANCHNEG, self.addr + 3)
+                self._emit(SML.BRANCHZERO, self.addr + 2)
+                self._emit_branch(SML.BRANCH, target)
+            elif relop == '>=':
+                self._emit(SML.BRANCHNEG, self.addr + 2)
+                self._emit_branch(SML.BRANCH, target)
+
+    def finish(self) -> List[int]:
+        """Imagem final: código, lacuna zerada e área de dados no topo."""
+        return self.words if self.data < 100 else self.words[:self.addr]
+
+
+def compile_stream(source_file: str, output: str = 'binary.txt'):
+    """Compila SIMPLE → SML em streaming, sem carregar o programa inteiro."""
+    print(f"→ Modo streaming: {source_file}\n")
+
+    scanner = Scanner()
+    gen = StreamGenerator(scanner.buf)
+    n_errors = 0
+    n_stmts = 0
+    try:
+        for item in analyze_stream(source_file, scanner):
+            if isinstance(item, Error):
+                n_errors += 1
+                print(f"{item}\n")
+            else:
+                n_stmts += 1
+                if not n_errors:
+                    gen.feed(item)
+    except FileNotFoundError:
+        print(f"✗ Arquivo '{source_file}' não encontrado")
+        sys.exit(1)
+
+    if n_errors:
+        print(f"✗ {n_errors} erro(s) encontrado(s)")
+        sys.exit(2)
+
+    print(f"  ✓ {n_stmts} statements analisados")
+    if gen.overflow:
+        print("✗ MEMORY OVERFLOW: código e dados excedem 100 palavras")
+        sys.exit(1)
+
+    words = gen.finish()
+    write_image(output, words)
+
+    print(f"  ✓ {len(words)}/100 palavras usadas")
+    print(f"✓ Código SML salvo em: {output}\n")
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # COMPILADOR PRINCIPAL
 # ═══════════════════════════════════════════════════════════════════════════
 
-def compile_simple(source_file: str):
-    """Compila SIMPLE → SML."""
+def format_word(word: int) -> str:
+    """Formata palavra SML com sinal e 4 dígitos (+1008, -0001)."""
+    sign = '+' if word >= 0 else '-'
+    return f"{sign}{abs(word):04d}"
 
-    print("╔" + "═" * 78 + "╗")
-    print(f"║{'COMPILADOR SIMPLE → SML':^78}║")
-    print("╚" + "═" * 78 + "╝\n")
-    print(f"Arquivo fonte: {source_file}\n")
 
-    # Fase 1: Análise
-    print("→ FASE 1: Análise (Léxica, Sintática, Semântica)")
-    errors, data = analyze(source_file)
+def format_listing(code: List[Dict]) -> str:
+    """Tabela endereço / palavra / comentário do código gerado."""
+    lines = ["╔════╦══════════╦════════════════════════════════════════════════════╗",
+             "║ ## ║  CÓDIGO  ║ COMENTÁRIO                                         ║",
+             "╠════╬══════════╬════════════════════════════════════════════════════╣"]
+    for instr in code:
+        word_str = format_word(instr['word'])
+        comment = instr['comment'][:52]
+        lines.append(f"║ {instr['addr']:2d} ║ {word_str} ║ {comment:<54} ║")
+    lines.append("╚════╩══════════╩════════════════════════════════════════════════════╝")
+    return "\n".join(lines)
 
-    if errors:
-        print(f"✗ {len(errors)} erro(s) encontrado(s):\n")
-        for e in errors:
-            print(f"{e}\n")
-        sys.exit(2)
 
-    print(f"  ✓ {len(data['statements'])} statements analisados")
-    print(f"  ✓ {len(data['labels'])} labels válidos\n")
+_tmp_seq = itertools.count()
 
-    # Fase 2: Geração de código
-    print("→ FASE 2: Geração de Código SML Otimizado")
+
+def write_image(path: str, words: List[int]):
+    """Grava a imagem atomicamente (arquivo temporário no mesmo diretório + rename)."""
+    directory, name = os.path.split(os.path.abspath(path))
+    while True:
+        tmp = os.path.join(directory, f".{name}.{os.getpid()}.{next(_tmp_seq)}.tmp")
+        try:
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(''.join(format_word(word) + "\n" for word in words))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class CompileResult:
+    """Resultado de compile_source().
+
+    words:    imagem SML (vazia se houve erro)
+    errors:   diagnósticos da análise
+    overflow: mensagem de memory overflow, se o programa não coube
+    stats:    statements, labels, instructions, vars, temps, consts, words
+    output:   caminho gravado, se pedido
+    """
+    __slots__ = ('words', 'errors', 'overflow', 'stats', 'output', 'code', '_listing')
+
+    def __init__(self, words: Optional[List[int]] = None, errors: Optional[List[Error]] = None,
+                 overflow: Optional[str] = None, stats: Optional[Dict[str, int]] = None,
+                 output: Optional[str] = None, code: Optional[List[Dict]] = None):
+        self.words = words if words is not None else []
+        self.errors = errors if errors is not None else []
+        self.overflow = overflow
+        self.stats = stats if stats is not None else {}
+        self.output = output
+        self.code = code if code is not None else []
+        self._listing = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and self.overflow is None
+
+    @property
+    def listing(self) -> str:
+        """Listagem formatada, montada só quando acessada."""
+        if self._listing is None:
+            self._listing = format_listing(self.code)
+        return self._listing
+
+    @listing.setter
+    def listing(self, text: str):
+        self._listing = text
+
+    def __repr__(self):
+        return (f"CompileResult(ok={self.ok}, words={len(self.words)}, errors={len(self.errors)}, "
+                f"overflow={self.overflow!r}, output={self.output!r})")
+
+
+def _compile(source: bytes) -> CompileResult:
+    """Análise + geração, sem efeitos colaterais."""
+    errors, data = analyze_lines(split_lines(source))
+    if errors:
+        return CompileResult(errors=errors)
+
+    stats = {'statements': len(data['statements']), 'labels': len(data['index'].label_to_idx)}
     gen = SMLGenerator(data)
-    code = gen.generate()
+    try:
+        code = gen.generate()
+    except MemoryOverflowError as e:
+        return CompileResult(overflow=str(e), stats=stats)
+
+    words = [instr['word'] for instr in code]
+    stats.update(
+        instructions=len([c for c in code if '# ' not in c['comment'] or 'var' not in c['comment']]),
+        vars=sum(1 for addr in gen.var_addr[:26] if addr >= 0),
+        var_slots=len(gen.slots),
+        temps=len(gen.temps),
+        consts=len(gen.consts),
+        words=len(words),
+        algebraic={name: hits for name, hits in gen.algebraic_hits.items() if hits},
+        peephole={name: hits for name, hits in gen.peephole_hits.items() if hits},
+        branches={name: hits for name, hits in gen.branch_hits.items() if hits},
+        accumulator=dict(gen.acc_hits),
+        folded_ifs=sum(1 for t in gen.taken if t >= 0),
+        unreachable=len(gen.live_stmt) - sum(gen.live_stmt),
+        removed_labels=gen.removed_labels(),
+        dead_lets=sum(gen.dropped),
+        reused=gen.reused,
+        hoisted=sum(gen.hoisted),
+    )
+    return CompileResult(words=words, stats=stats, code=code)
+
+
+def compile_source(source: Union[str, bytes], output: Optional[str] = None, cache=None) -> CompileResult:
+    """Compila um programa SIMPLE em memória.
+
+    Não imprime nada e não usa estado global: pode ser chamada em paralelo por
+    várias threads. Se output for dado e a compilação der certo, a imagem é
+    gravada nele atomicamente. cache (compilador_cache.CompileCache) evita
+    recompilar fontes já vistos.
+    """
+    if isinstance(source, str):
+        source = source.encode('utf-8')
+
+    if cache is None:
+        result = _compile(source)
+    else:
+        key = cache.key(source)
+        result = cache.get(key)
+        if result is None:
+            result = _compile(source)
+            cache.put(key, result)
+
+    if output is not None and result.ok:
+        write_image(output, result.words)
+        result.output = output
+    return result
+
+
+def compile_report(source_file: str, output: str = 'binary.txt', cwd: Optional[str] = None,
+                   cache=None, listing: bool = True) -> Tuple[str, int]:
+    """Compila o arquivo e monta o relatório do CLI: (texto, código de saída).
+
+    Códigos: 0 sucesso, 1 arquivo ausente ou memory overflow, 2 erros no fonte.
+    cwd é o diretório base dos caminhos relativos; o relatório mostra os
+    caminhos como recebidos. Com listing=False a tabela do código não é
+    montada.
+    """
+    out = []
+    emit = out.append
+
+    emit("╔" + "═" * 78 + "╗")
+    emit(f"║{'COMPILADOR SIMPLE → SML':^78}║")
+    emit("╚" + "═" * 78 + "╝\n")
+    emit(f"Arquivo fonte: {source_file}\n")
+
+    # Fase 1: Análise
+    emit("→ FASE 1: Análise (Léxica, Sintática, Semântica)")
+    try:
+        with open(os.path.join(cwd or '', source_file), 'rb') as f:
+            source = f.read()
+    except FileNotFoundError:
+        emit(f"✗ Arquivo '{source_file}' não encontrado")
+        return "\n".join(out), 1
 
-    n_instrs = len([c for c in code if '# ' not in c['comment'] or 'var' not in c['comment']])
-    n_vars = len(gen.vars)
-    n_temps = len(set(gen.temps))
-    n_consts = len(gen.consts)
-    total = len(code)
+    result = compile_source(source, os.path.join(cwd or '', output), cache)
+    stats = result.stats
 
-    print(f"  ✓ {n_instrs} instruções geradas")
-    print(f"  ✓ {n_vars} variáveis alocadas")
-    print(f"  ✓ {n_temps} temporários alocados")
-    print(f"  ✓ {n_consts} constantes alocadas")
-    print(f"  ✓ {total}/100 palavras usadas ({total}%)\n")
+    if result.errors:
+        emit(f"✗ {len(result.errors)} erro(s) encontrado(s):\n")
+        for e in result.errors:
+            emit(f"{e}\n")
+        return "\n".join(out), 2
+
+    emit(f"  ✓ {stats['statements']} statements analisados")
+    emit(f"  ✓ {stats['labels']} labels válidos\n")
+
+    # Fase 2: Geração de código
+    emit("→ FASE 2: Geração de Código SML Otimizado")
+    if result.overflow:
+        emit(f"✗ MEMORY OVERFLOW: {result.overflow}")
+        return "\n".join(out), 1
+
+    total = stats['words']
+    emit(f"  ✓ {stats['instructions']} instruções geradas")
+    emit(f"  ✓ {stats['vars']} variáveis alocadas em {stats['var_slots']} palavra(s)")
+    emit(f"  ✓ {stats['temps']} temporários alocados")
+    emit(f"  ✓ {stats['consts']} constantes alocadas")
+    emit(f"  ✓ {total}/100 palavras usadas ({total}%)\n")
 
     # Estatísticas de otimização
-    print("→ OTIMIZAÇÕES APLICADAS:")
-    print("  ✓ Constant folding em expressões")
-    print("  ✓ Reutilização de registradores temporários")
-    print("  ✓ Eliminação de instruções redundantes")
-    print(f"  ✓ Taxa de uso de memória: {total}%\n")
+    emit("→ OTIMIZAÇÕES APLICADAS:")
+    emit("  ✓ Constant folding em expressões")
+    hits = stats['algebraic']
+    detail = ", ".join(f"{name} {count}" for name, count in hits.items())
+    emit(f"  ✓ Simplificação algébrica: {sum(hits.values())} reescrita(s)" + (f" ({detail})" if detail else ""))
+    emit(f"  ✓ Propagação de constantes (SSA/SCCP): {stats['folded_ifs']} if(s) decidido(s), "
+         f"{stats['unreachable']} statement(s) inalcançável(is) removido(s)")
+    removed = stats['removed_labels']
+    emit(f"  ✓ Labels inalcançáveis removidos: {', '.join(map(str, removed)) if removed else 'nenhum'}")
+    emit(f"  ✓ Subexpressões comuns (numeração de valores): {stats['reused']} expressão(ões) reaproveitada(s)")
+    emit(f"  ✓ Movimentação de código invariante: {stats['hoisted']} let(s) içado(s) para o preheader do laço")
+    emit("  ✓ Reutilização de registradores temporários")
+    emit(f"  ✓ Eliminação de stores mortos: {stats['dead_lets']} let(s) removido(s)")
+    hits = stats['peephole']
+    detail = ", ".join(f"{name} {count}" for name, count in hits.items())
+    emit(f"  ✓ Peephole: {sum(hits.values())} reescrita(s)" + (f" ({detail})" if detail else ""))
+    hits = stats['branches']
+    detail = ", ".join(f"{name} {count}" for name, count in hits.items())
+    emit(f"  ✓ Otimização de desvios: {sum(hits.values())} reescrita(s)" + (f" ({detail})" if detail else ""))
+    acc = stats['accumulator']
+    emit(f"  ✓ Rastreamento do acumulador: {acc['load']} load(s) e {acc['store']} store(s) redundante(s) removido(s)")
+    emit("  ✓ Eliminação de instruções redundantes")
+    emit(f"  ✓ Taxa de uso de memória: {total}%\n")
 
     # Exibe código
-    print("╔════╦══════════╦════════════════════════════════════════════════════╗")
-    print("║ ## ║  CÓDIGO  ║ COMENTÁRIO                                         ║")
-    print("╠════╬══════════╬════════════════════════════════════════════════════╣")
-    for instr in code:
-        word = instr['word']
-        sign = '+' if word >= 0 else '-'
-        abs_word = abs(word)
-        word_str = f"{sign}{abs_word:04d}"
-        comment = instr['comment'][:52]
-        print(f"║ {instr['addr']:2d} ║ {word_str} ║ {comment:<54} ║")
-    print("╚════╩══════════╩════════════════════════════════════════════════════╝\n")
+    if listing:
+        emit(result.listing + "\n")
 
-    # Salva binary.txt
-    with open('binary.txt', 'w') as f:
-        for instr in code:
-            word = instr['word']
-            sign = '+' if word >= 0 else '-'
-            f.write(f"{sign}{abs(word):04d}\n")
+    emit(f"✓ Código SML salvo em: {output}")
+    emit("✓ Compilação concluída com sucesso!\n")
+    return "\n".join(out), 0
 
-    print("✓ Código SML salvo em: binary.txt")
-    print("✓ Compilação concluída com sucesso!\n")
+
+def compile_simple(source_file: str, output: str = 'binary.txt', cache=None, listing: bool = True):
+    """Compila SIMPLE → SML imprimindo o relatório (sai com código != 0 em erro)."""
+    text, status = compile_report(source_file, output, cache=cache, listing=listing)
+    print(text)
+    if status:
+        sys.exit(status)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # PONTO DE ENTRADA
 # ═══════════════════════════════════════════════════════════════════════════
 
-if __name__ == '__main__':
+def main(argv: List[str]):
+    """CLI. Sem opções (o caso comum) não importa argparse."""
+    if len(argv) <= 1 and not any(arg.startswith('-') for arg in argv):
+        compile_simple(argv[0] if argv else 'simple.txt')
+        return
+
     import argparse
 
     parser = argparse.ArgumentParser(
@@ -889,11 +1980,35 @@ if __name__ == '__main__':
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     parser.add_argument('arquivo', nargs='?', default='simple.txt', help='Arquivo fonte SIMPLE')
+    parser.add_argument('--stream', action='store_true',
+                        help='Modo streaming: sem reter o programa, sem otimizações globais')
+    parser.add_argument('--watch', action='store_true',
+                        help='Recompila incrementalmente a cada alteração do arquivo')
+    parser.add_argument('--cache', action='store_true',
+                        help='Reaproveita compilações anteriores do cache em disco')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Diretório do cache (padrão: $SIMPLE_CACHE_DIR ou ~/.cache/compilador-simple)')
+    parser.add_argument('--sem-listagem', action='store_true',
+                        help='Não exibe (nem monta) a tabela do código gerado')
+
+    args = parser.parse_args(argv)
+
+    if args.watch:
+        from compilador_incremental import watch
+        watch(args.arquivo)
+    elif args.stream:
+        compile_stream(args.arquivo)
+    else:
+        cache = None
+        if args.cache or args.cache_dir:
+            from compilador_cache import CompileCache
+            cache = CompileCache(args.cache_dir)
+        compile_simple(args.arquivo, cache=cache, listing=not args.sem_listagem)
 
-    args = parser.parse_args()
 
+if __name__ == '__main__':
     try:
-        compile_simple(args.arquivo)
+        main(sys.argv[1:])
         sys.exit(0)
     except KeyboardInterrupt:
         print("\n✗ Compilação cancelada")
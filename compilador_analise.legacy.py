@@ -10,7 +10,7 @@ Retornos:
 import re
 import sys
 from dataclasses import dataclass
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 
 # ---------------- Data classes ----------------
 @dataclass
@@ -286,7 +286,12 @@ def semantic_analysis(non_comment_lines: List[Dict], tokens_by_line: Dict[int, L
     return errs
 
 # ---------------- Pipeline ----------------
-def analyze_file(path: str) -> List[AnalysisError]:
+def analyze_program(path: str) -> Tuple[List[AnalysisError], List[Dict], Dict[int, List[Token]]]:
+    """Analisa o arquivo uma única vez.
+
+    Retorna (erros, linhas não-comentário, tokens por linha); a síntese
+    constrói a AST a partir desses tokens sem reler nem re-tokenizar o fonte.
+    """
     errors: List[AnalysisError] = []
     try:
         with open(path, 'r', encoding='utf-8') as f:
@@ -336,6 +341,10 @@ def analyze_file(path: str) -> List[AnalysisError]:
     sem_errs = semantic_analysis(non_comment_lines, tokens_by_line)
     errors.extend(sem_errs)
 
+    return errors, non_comment_lines, tokens_by_line
+
+def analyze_file(path: str) -> List[AnalysisError]:
+    errors, _, _ = analyze_program(path)
     return errors
 
 # ---------------- CLI ----------------
@@ -0,0 +1,153 @@
+"""
+Cache em disco de compilações SIMPLE → SML, endereçado por conteúdo.
+
+Uso:
+    python3 compilador.py --cache programa.txt
+    python3 compilador_lote.py testes/ --cache
+
+    from compilador import compile_source
+    from compilador_cache import CompileCache
+    result = compile_source(fonte, cache=CompileCache())
+
+A chave é o SHA-256 dos bytes do fonte + impressão digital do compilador
+(hash de compilador.py, compilador_ir.py e compilador_otimizacao.py, que mudam
+a cada versão, e do formato das entradas) + opções de compilação. Cada entrada
+guarda a imagem, os comentários do código, as estatísticas e os diagnósticos; um
+acerto não passa por analyze() nem pelo SMLGenerator, e a listagem só é
+montada se for lida.
+
+O diretório fica abaixo de max_bytes: o uso de uma entrada atualiza seu mtime
+e, ao passar do limite, as entradas usadas há mais tempo são removidas (LRU).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Optional
+
+import compilador
+import compilador_ir
+import compilador_otimizacao
+from compilador import CompileResult, Error
+
+DEFAULT_MAX_BYTES = 64 << 20
+ENTRY_FORMAT = 2        # muda quando o conteúdo das entradas muda
+
+
+def default_directory() -> str:
+    """$SIMPLE_CACHE_DIR ou ~/.cache/compilador-simple."""
+    return os.environ.get('SIMPLE_CACHE_DIR') or os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'compilador-simple')
+
+
+def compiler_fingerprint() -> str:
+    """Hash do código do compilador: entradas de outra versão nunca são reaproveitadas."""
+    h = hashlib.sha256(b'%d' % ENTRY_FORMAT)
+    for module in (compilador, compilador_ir, compilador_otimizacao):
+        with open(module.__file__, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+class CompileCache:
+    """Cache LRU em disco; uma entrada JSON por chave."""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.fingerprint = compiler_fingerprint()
+        self.size = None        # bytes em disco (estimado após a primeira varredura)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source: bytes, options: Optional[Dict] = None) -> str:
+        h = hashlib.sha256(source)
+        h.update(b'\0' + self.fingerprint.encode())
+        h.update(b'\0' + json.dumps(options or {}, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, key: str) -> Optional[CompileResult]:
+        """Resultado guardado para a chave (None se ausente ou ilegível)."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = json.loads(f.read())
+            os.utime(path)      # marca como usada recentemente
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        words = entry['words']
+        code = [{'addr': addr, 'word': word, 'comment': comment}
+                for addr, (word, comment) in enumerate(zip(words, entry['comments']))]
+        return CompileResult(words=words, errors=[Error(**e) for e in entry['errors']],
+                             overflow=entry['overflow'], stats=entry['stats'], code=code)
+
+    def put(self, key: str, result: CompileResult):
+        """Guarda o resultado (escrita atômica) e aplica o limite de tamanho.
+
+        A listagem não é formatada aqui: a entrada guarda só os comentários.
+        """
+        entry = {'words': result.words, 'errors': [e.as_dict() for e in result.errors],
+                 'overflow': result.overflow, 'stats': result.stats,
+                 'comments': [instr['comment'] for instr in result.code]}
+        data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.stat(path).st_size     # entrada sobrescrita não conta duas vezes
+        except FileNotFoundError:
+            replaced = 0
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        if self.size is None:
+            self.size = sum(size for _, size, _ in self._entries())
+        else:
+            self.size += len(data) - replaced
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        """(mtime, tamanho, caminho) de cada entrada.
+
+        Outro processo pode remover entradas durante a varredura (evict em
+        paralelo no compilador_lote): as que somem são ignoradas.
+        """
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            try:
+                entries = list(os.scandir(sub.path))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.name.endswith('.json'):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield st.st_mtime_ns, st.st_size, entry.path
+
+    def evict(self, target: Optional[int] = None):
+        """Remove as entradas menos usadas até ficar abaixo de target (90% do limite)."""
+        target = int(self.max_bytes * 0.9) if target is None else target
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self.size = size
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Cliente do servidor de compilação: substitui `python3 compilador.py arquivo.txt`.
+
+Uso:
+    python3 compilador_cliente.py [arquivo.txt] [--socket CAMINHO]
+
+Envia o arquivo ao compilador_servidor.py e imprime o mesmo relatório e
+código de saída do CLI; binary.txt é gravado no diretório atual. Só importa
+módulos leves; se o servidor não estiver no ar, compila localmente.
+"""
+
+import json
+import os
+import socket
+import sys
+
+
+def default_socket() -> str:
+    """Mesmo padrão de compilador_servidor.default_socket()."""
+    return os.environ.get('SIMPLE_SOCKET') or f"/tmp/compilador-simple-{os.getuid()}.sock"
+
+
+def request(socket_path: str, req: dict) -> dict:
+    """Envia uma requisição e espera a resposta (uma linha JSON)."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(req).encode('utf-8') + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b''.join(chunks))
+
+
+def main(argv) -> int:
+    args = list(argv)
+    socket_path = default_socket()
+    if '--socket' in args:
+        i = args.index('--socket')
+        socket_path = args[i + 1]
+        del args[i:i + 2]
+    source_file = args[0] if args else 'simple.txt'
+
+    req = {'arquivo': source_file, 'saida': 'binary.txt', 'cwd': os.getcwd(), 'relatorio': True}
+    try:
+        resp = request(socket_path, req)
+    except (FileNotFoundError, ConnectionRefusedError):
+        from compilador import compile_report
+        text, status = compile_report(source_file)
+    else:
+        if 'erro' in resp:
+            print(f"\n✗ ERRO FATAL: {resp['erro']}")
+            return 1
+        text, status = resp['relatorio'], resp['codigo']
+
+    print(text)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Recompilação incremental e modo watch do compilador SIMPLE → SML.
+
+Uso:
+    python3 compilador.py --watch arquivo.txt
+    python3 compilador_incremental.py arquivo.txt [--intervalo 0.2]
+
+A cada gravação do arquivo:
+  - só as linhas alteradas (diferença entre prefixo e sufixo comuns) são
+    escaneadas; o resultado do scan/parse fica em cache pelo hash do texto;
+  - a análise semântica só é refeita quando labels ou desvios mudam; caso
+    contrário o ProgramIndex é atualizado apenas nos statements alterados;
+  - o gerador só roda quando algum statement mudou (editar comentários e
+    linhas em branco reaproveita a imagem anterior).
+
+O gerador em si continua rodando sobre o programa inteiro: constant
+propagation e alocação de memória são globais, e um programa válido tem no
+máximo algumas dezenas de statements.
+"""
+
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from compilador import (
+    KW, Analyzer, Error, MemoryOverflowError, Scanner, SMLGenerator,
+    TokenBuffer, _analyze_line, write_image,
+)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CACHE POR LINHA
+# ═══════════════════════════════════════════════════════════════════════════
+
+class LineResult:
+    """Resultado do scan/parse de uma linha, independente do número da linha.
+
+    kinds/vals/cols: fatia de tokens do statement (vazia se houve erro)
+    errors:          (fase, mensagem, coluna, texto) de cada erro da linha
+    sig:             (label, destino, é_end) — o que a semântica enxerga
+    """
+    __slots__ = ('label', 'kinds', 'vals', 'cols', 'text', 'errors', 'sig')
+
+    def __init__(self, label, kinds, vals, cols, text, errors):
+        self.label = label
+        self.kinds = kinds
+        self.vals = vals
+        self.cols = cols
+        self.text = text
+        self.errors = errors
+        self.sig = None
+        if not errors:
+            kw = vals[0]
+            target = vals[1] if kw == KW.GOTO else vals[-1] if kw == KW.IF else -1
+            self.sig = (label, target, kw == KW.END)
+
+
+def _is_stmt(r: Optional[LineResult]) -> bool:
+    return r is not None and not r.errors
+
+
+class IncrementalCompiler:
+    """Mantém o estado da última compilação e recompila só o que mudou."""
+
+    def __init__(self, path: str, output: str = 'binary.txt'):
+        self.path = path
+        self.output = output
+        self.cache = {}          # texto da linha (bytes) -> LineResult | None
+        self.scanner = Scanner()
+
+        self.lines = []          # linhas da versão anterior
+        self.results = []        # LineResult | None por linha
+        self.n_error_lines = 0   # linhas com erro léxico/sintático
+
+        self.buf = TokenBuffer()
+        self.statements = []     # dicts no formato de analyze()
+        self.index = None        # ProgramIndex da última análise sem erros
+        self.words = None        # imagem da última geração sem erros
+
+    # ─── Cache ────────────────────────────────────────────────────────────
+
+    def _scan(self, raw: bytes) -> Optional[LineResult]:
+        """Scan/parse de uma linha, consultando o cache."""
+        try:
+            return self.cache[raw]
+        except KeyError:
+            pass
+
+        buf = self.scanner.buf
+        stmt, errors = _analyze_line(self.scanner, 0, raw)
+        if errors:
+            result = LineResult(None, b'', (), (), errors[0].text,
+                                [(e.phase, e.msg, e.col, e.text) for e in errors])
+        elif stmt is not None:
+            s, e = stmt['start'], stmt['end']
+            result = LineResult(stmt['label'], buf.kinds[s:e], buf.vals[s:e],
+                                buf.cols[s:e], stmt['text'], [])
+        else:
+            result = None
+        buf.truncate(0)
+
+        self.cache[raw] = result
+        return result
+
+    def _append_tokens(self, r: LineResult, line: int) -> Dict:
+        """Copia os tokens de um LineResult para o buffer do programa."""
+        buf = self.buf
+        start = len(buf)
+        buf.kinds.extend(r.kinds)
+        buf.vals.extend(r.vals)
+        buf.cols.extend(r.cols)
+        return {'label': r.label, 'line': line, 'text': r.text, 'start': start, 'end': len(buf)}
+
+    # ─── Recompilação ─────────────────────────────────────────────────────
+
+    def rebuild(self) -> Dict:
+        """Relê o arquivo e recompila o necessário.
+
+        Retorna um relatório com 'errors', 'overflow' (mensagem de memory
+        overflow), 'words', 'scanned' (linhas escaneadas), 'semantic' e
+        'generated' (fases que rodaram).
+        """
+        with open(self.path, 'rb') as f:
+            lines = [raw.rstrip(b'\r') for raw in f.read().split(b'\n')]
+
+        # Região alterada: tudo entre o prefixo e o sufixo comuns
+        old = self.lines
+        n_old, n_new = len(old), len(lines)
+        limit = min(n_old, n_new)
+        pre = 0
+        while pre < limit and old[pre] == lines[pre]:
+            pre += 1
+        suf = 0
+        while suf < limit - pre and old[n_old - 1 - suf] == lines[n_new - 1 - suf]:
+            suf += 1
+
+        old_region = self.results[pre:n_old - suf]
+        new_region = [self._scan(raw) for raw in lines[pre:n_new - suf]]
+        self.results[pre:n_old - suf] = new_region
+        self.lines = lines
+        self.n_error_lines += (sum(1 for r in new_region if r is not None and r.errors)
+                               - sum(1 for r in old_region if r is not None and r.errors))
+
+        report = {'errors': [], 'overflow': None, 'words': None, 'scanned': len(new_region),
+                  'semantic': False, 'generated': False}
+
+        # Erros léxicos/sintáticos: a análise anterior deixa de valer
+        if self.n_error_lines:
+            self.index = self.words = None
+            report['errors'] = [Error(phase, msg, i, col, text)
+                                for i, r in enumerate(self.results, 1)
+                                if r is not None and r.errors
+                                for phase, msg, col, text in r.errors]
+            return report
+
+        old_stmts = [r for r in old_region if _is_stmt(r)]
+        new_stmts = [r for r in new_region if _is_stmt(r)]
+        stmts_changed = old_stmts != new_stmts
+        flow_changed = [r.sig for r in old_stmts] != [r.sig for r in new_stmts]
+
+        if self.index is None or flow_changed:
+            errors = self._analyze_all()
+            report['semantic'] = True
+            if errors:
+                self.index = self.words = None
+                report['errors'] = errors
+                return report
+        else:
+            self._patch(pre, n_old - suf, n_new - n_old, new_region)
+
+        if stmts_changed or self.words is None:
+            gen = SMLGenerator({'statements': self.statements, 'index': self.index, 'tokens': self.buf})
+            try:
+                self.words = [instr['word'] for instr in gen.generate()]
+            except MemoryOverflowError as e:
+                self.words = None
+                report['overflow'] = str(e)
+                return report
+            report['generated'] = True
+
+        report['words'] = self.words
+        return report
+
+    def _analyze_all(self) -> List[Error]:
+        """Análise semântica completa a partir dos resultados em cache."""
+        self.buf = TokenBuffer()
+        analyzer = Analyzer(self.buf)
+        for i, r in enumerate(self.results, 1):
+            if _is_stmt(r):
+                analyzer.add(self._append_tokens(r, i))
+
+        errors = analyzer.finish()
+        self.statements = analyzer.statements
+        self.index = analyzer.index
+        return errors
+
+    def _patch(self, lo: int, hi: int, delta: int, new_region: List[Optional[LineResult]]):
+        """Atualiza statements e índice quando labels e desvios não mudaram.
+
+        lo/hi delimitam a região alterada (linhas 0-based da versão anterior) e
+        delta é a variação no número de linhas. Como a sequência de assinaturas
+        é a mesma, os statements da região mantêm seus índices.
+        """
+        statements = self.statements
+        first = bisect_left(statements, lo + 1, key=lambda s: s['line'])
+
+        idx = first
+        for i, r in enumerate(new_region, lo + 1):
+            if not _is_stmt(r):
+                continue
+            stmt = statements[idx]
+            if r.kinds != self.buf.kinds[stmt['start']:stmt['end']] or \
+               r.vals != self.buf.vals[stmt['start']:stmt['end']]:
+                stmt = statements[idx] = self._append_tokens(r, i)
+                self.index.replace(idx, self.buf, stmt['start'], stmt['end'])
+            else:
+                stmt['line'], stmt['text'] = i, r.text
+            idx += 1
+
+        if delta:
+            for stmt in statements[idx:]:
+                stmt['line'] += delta
+
+        # Compacta o buffer quando as versões antigas dominam
+        if len(self.buf) > 4 * sum(s['end'] - s['start'] for s in statements) + 4096:
+            self._analyze_all()
+
+    def write(self, words: List[int]):
+        """Grava a imagem no arquivo de saída (atomicamente)."""
+        write_image(self.output, words)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MODO WATCH
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _stat(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _rebuild_and_report(compiler: IncrementalCompiler):
+    """Recompila e imprime uma linha de status (ou os erros)."""
+    t0 = time.perf_counter()
+    report = compiler.rebuild()
+    ms = (time.perf_counter() - t0) * 1000
+    stamp = time.strftime('%H:%M:%S')
+
+    if report['errors']:
+        print(f"[{stamp}] ✗ {len(report['errors'])} erro(s) encontrado(s):\n")
+        for e in report['errors']:
+            print(f"{e}\n")
+        return
+    if report['overflow']:
+        print(f"[{stamp}] ✗ MEMORY OVERFLOW: {report['overflow']}")
+        return
+
+    compiler.write(report['words'])
+    phases = [name for name, ran in (('semântica', report['semantic']),
+                                     ('geração', report['generated'])) if ran]
+    print(f"[{stamp}] ✓ {compiler.output}: {len(report['words'])}/100 palavras "
+          f"({report['scanned']} linha(s) reescaneada(s)"
+          f"{''.join(', ' + p for p in phases)}; {ms:.1f} ms)")
+
+
+def watch(source_file: str, output: str = 'binary.txt', interval: float = 0.2):
+    """Recompila a cada alteração do arquivo até Ctrl+C."""
+    compiler = IncrementalCompiler(source_file, output)
+    print(f"Observando '{source_file}' (Ctrl+C para sair)\n")
+
+    last = None
+    try:
+        while True:
+            current = _stat(source_file)
+            if current != last:
+                last = current
+                if current is None:
+                    print(f"✗ Arquivo '{source_file}' não encontrado")
+                else:
+                    _rebuild_and_report(compiler)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n✓ Modo watch encerrado")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compilador SIMPLE → SML em modo watch')
+    parser.add_argument('arquivo', help='Arquivo fonte SIMPLE')
+    parser.add_argument('-o', '--saida', default='binary.txt', help='Arquivo de saída')
+    parser.add_argument('--intervalo', type=float, default=0.2, help='Intervalo de verificação (s)')
+    args = parser.parse_args()
+
+    watch(args.arquivo, args.saida, args.intervalo)
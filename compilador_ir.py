@@ -0,0 +1,157 @@
+"""
+Definições compartilhadas do compilador SIMPLE → SML.
+
+Opcodes do Simpletron, palavras-chave, a IR de statements e os operandos
+simbólicos das instruções geradas. Usadas por compilador (análise e geração)
+e por compilador_otimizacao (passadas sobre a IR e sobre as instruções); este
+módulo não importa nenhum dos dois.
+"""
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CÓDIGOS DE OPERAÇÃO SML (Simpletron Machine Language)
+# ═══════════════════════════════════════════════════════════════════════════
+
+class SML:
+    """Códigos de operação do Simpletron."""
+    # I/O
+    READ = 10
+    WRITE = 11
+    # Load/Store
+    LOAD = 20
+    STORE = 21
+    # Aritmética
+    ADD = 30
+    SUB = 31
+    DIV = 32
+    MUL = 33
+    MOD = 34
+    # Controle
+    BRANCH = 40
+    BRANCHNEG = 41
+    BRANCHZERO = 42
+    HALT = 43
+
+    WORD_MAX = 9999     # maior valor de uma palavra e do acumulador (em módulo)
+
+
+class KW:
+    """Códigos de palavra-chave (valor de tokens TK.KW)."""
+    REM = 0
+    INPUT = 1
+    LET = 2
+    PRINT = 3
+    GOTO = 4
+    IF = 5
+    END = 6
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REPRESENTAÇÃO INTERMEDIÁRIA
+# ═══════════════════════════════════════════════════════════════════════════
+
+class OPND:
+    """Tipos de operando de uma expressão."""
+    NUM = 0     # literal (já com sinal: '-3' vira NUM -3)
+    VAR = 1     # variável (índice 0-25)
+    NEG = 2     # variável negada: '-x'
+
+
+class Expr:
+    """Expressão pré-decodificada: um operando ou uma operação binária.
+
+    op:     Expr.MOV (operando único) ou opcode SML da operação (ADD..MOD)
+    lk, lv: tipo (OPND) e valor do operando esquerdo (literal ou índice da variável)
+    rk, rv: idem para o operando direito (só em operação binária)
+    """
+    __slots__ = ('op', 'lk', 'lv', 'rk', 'rv')
+
+    MOV = 0
+
+    def __init__(self, op: int, lk: int, lv: int, rk: int = OPND.NUM, rv: int = 0):
+        self.op = op
+        self.lk = lk
+        self.lv = lv
+        self.rk = rk
+        self.rv = rv
+
+
+class Stmt:
+    """Statement da IR; 'kind' é o código KW da palavra-chave."""
+    __slots__ = ('label', 'line')
+    kind = -1
+
+    def __init__(self, label: int, line: int):
+        self.label = label
+        self.line = line
+
+
+class InputStmt(Stmt):
+    __slots__ = ('var',)
+    kind = KW.INPUT
+
+    def __init__(self, label: int, line: int, var: int):
+        super().__init__(label, line)
+        self.var = var
+
+
+class PrintStmt(Stmt):
+    __slots__ = ('var',)
+    kind = KW.PRINT
+
+    def __init__(self, label: int, line: int, var: int):
+        super().__init__(label, line)
+        self.var = var
+
+
+class LetStmt(Stmt):
+    __slots__ = ('var', 'expr')
+    kind = KW.LET
+
+    def __init__(self, label: int, line: int, var: int, expr: Expr):
+        super().__init__(label, line)
+        self.var = var
+        self.expr = expr
+
+
+class GotoStmt(Stmt):
+    __slots__ = ('target',)
+    kind = KW.GOTO
+
+    def __init__(self, label: int, line: int, target: int):
+        super().__init__(label, line)
+        self.target = target
+
+
+class IfGotoStmt(Stmt):
+    """if left relop right goto target (relop é índice em RELOPS)."""
+    __slots__ = ('left', 'relop', 'right', 'target')
+    kind = KW.IF
+
+    def __init__(self, label: int, line: int, left: Expr, relop: int, right: Expr, target: int):
+        super().__init__(label, line)
+        self.left = left
+        self.relop = relop
+        self.right = right
+        self.target = target
+
+
+class EndStmt(Stmt):
+    __slots__ = ()
+    kind = KW.END
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INSTRUÇÕES GERADAS
+# ═══════════════════════════════════════════════════════════════════════════
+
+MNEMONIC = {SML.LOAD: 'load', SML.ADD: 'add', SML.SUB: 'sub', SML.MUL: 'mul', SML.DIV: 'div', SML.MOD: 'mod',
+            SML.STORE: 'store', SML.READ: 'read', SML.WRITE: 'write'}
+
+
+class REF:
+    """Tipo do operando simbólico de uma entrada da tabela de relocação."""
+    NONE = -1   # operando absoluto (não relocado)
+    VAR = 0     # variável (0-25)
+    CONST = 1   # valor constante
+    TEMP = 2    # slot de temporário (0: lado esquerdo de um if composto)
+    LABEL = 3   # label SIMPLE de destino (negativo: label local do gerador)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Compilação em lote do compilador SIMPLE → SML.
+
+Uso:
+    python3 compilador_lote.py testes/
+    python3 compilador_lote.py 'alunos/**/*.txt' -j 8 -o binarios
+
+Distribui os arquivos por um pool de processos e escreve em stdout um registro
+JSON por programa (JSON lines), na ordem em que terminam:
+
+    {"arquivo": "testes/test01_soma_simples.txt", "ok": true, "erros": [],
+     "overflow": null, "palavras": 11, "imagem": "binarios/test01_soma_simples.bin.txt",
+     "ms": 0.4}
+
+Os workers recebem apenas caminhos e leem o fonte direto do disco, então o
+texto dos programas nunca passa pelo pickle. O resumo vai para stderr.
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+from compilador import compile_source
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SELEÇÃO DE ARQUIVOS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def expand_sources(patterns: List[str]) -> List[str]:
+    """Diretórios viram todos os *.txt abaixo deles; o resto é tratado como glob."""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(glob.glob(os.path.join(pattern, '**', '*.txt'), recursive=True))
+        else:
+            files.extend(glob.glob(pattern, recursive=True))
+    return sorted(set(f for f in files if os.path.isfile(f)))
+
+
+def image_path(source: str, root: str, out_dir: str) -> str:
+    """Caminho da imagem: estrutura relativa a root espelhada em out_dir."""
+    rel = os.path.relpath(source, root)
+    stem, _ = os.path.splitext(rel)
+    return os.path.join(out_dir, stem + '.bin.txt')
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# WORKER
+# ═══════════════════════════════════════════════════════════════════════════
+
+@lru_cache(maxsize=None)
+def _open_cache(directory: str):
+    """Um CompileCache por processo e diretório ('' = diretório padrão)."""
+    from compilador_cache import CompileCache
+    return CompileCache(directory or None)
+
+
+def compile_one(job: Tuple[str, Optional[str], Optional[str]]) -> Tuple[bool, str]:
+    """Compila um arquivo e retorna (ok, registro JSON em uma linha).
+
+    job: (fonte, imagem ou None, diretório do cache ou None para não usar)
+    """
+    source, image, cache_dir = job
+    t0 = time.perf_counter()
+    record = {'arquivo': source, 'ok': False, 'erros': [], 'overflow': None,
+              'palavras': None, 'imagem': None}
+
+    try:
+        with open(source, 'rb') as f:
+            text = f.read()
+        if image is not None:
+            os.makedirs(os.path.dirname(image) or '.', exist_ok=True)
+        cache = _open_cache(cache_dir) if cache_dir is not None else None
+        result = compile_source(text, image, cache)
+        record.update(ok=result.ok, erros=[e.as_dict() for e in result.errors],
+                      overflow=result.overflow, palavras=len(result.words) if result.ok else None,
+                      imagem=image if result.ok else None)
+    except (OSError, UnicodeDecodeError) as e:
+        record['erros'] = [{'phase': 'io', 'msg': str(e), 'line': 0, 'col': 0, 'text': ''}]
+
+    record['ms'] = round((time.perf_counter() - t0) * 1000, 3)
+    return record['ok'], json.dumps(record, ensure_ascii=False)
+
+
+def compile_batch(jobs: List[Tuple[str, Optional[str], Optional[str]]], workers: int) -> Iterator[Tuple[bool, str]]:
+    """Resultados de compile_one na ordem em que os programas terminam."""
+    if workers <= 1 or len(jobs) <= 1:
+        yield from map(compile_one, jobs)
+        return
+
+    from multiprocessing import Pool
+
+    # Blocos pequenos o bastante para balancear, grandes o bastante para
+    # amortizar a comunicação com o pool
+    chunksize = max(1, len(jobs) // (workers * 8))
+    with Pool(workers) as pool:
+        yield from pool.imap_unordered(compile_one, jobs, chunksize)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PONTO DE ENTRADA
+# ═══════════════════════════════════════════════════════════════════════════
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compilação em lote SIMPLE → SML (saída em JSON lines)')
+    parser.add_argument('fontes', nargs='+', help='Diretórios ou globs com programas SIMPLE')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Número de processos (padrão: núcleos disponíveis)')
+    parser.add_argument('-o', '--saida', default='binarios',
+                        help='Diretório das imagens geradas (padrão: binarios)')
+    parser.add_argument('--sem-imagem', action='store_true', help='Não grava as imagens')
+    parser.add_argument('--cache', action='store_true', help='Usa o cache de compilação em disco')
+    parser.add_argument('--cache-dir', default=None, help='Diretório do cache (implica --cache)')
+    args = parser.parse_args(argv)
+
+    sources = expand_sources(args.fontes)
+    if not sources:
+        print("✗ Nenhum arquivo encontrado", file=sys.stderr)
+        return 1
+
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(s)) for s in sources])
+    cache_dir = (args.cache_dir or '') if args.cache or args.cache_dir else None
+    jobs = [(s, None if args.sem_imagem else image_path(os.path.abspath(s), root, args.saida), cache_dir)
+            for s in sources]
+
+    t0 = time.perf_counter()
+    counts = {'ok': 0, 'erro': 0}
+    out = sys.stdout
+    for ok, line in compile_batch(jobs, args.jobs):
+        out.write(line + "\n")
+        counts['ok' if ok else 'erro'] += 1
+    out.flush()
+    elapsed = time.perf_counter() - t0
+
+    print(f"✓ {len(jobs)} programa(s) em {elapsed:.2f}s ({len(jobs) / elapsed:.0f}/s, "
+          f"{args.jobs} processo(s)): {counts['ok']} ok, {counts['erro']} com erro", file=sys.stderr)
+    return 0 if counts['erro'] == 0 else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1161 @@
+"""
+Passadas de otimização do compilador SIMPLE → SML.
+
+Sobre os statements: grafo de fluxo de controle, fluxo de dados (variáveis
+vivas, expressões disponíveis), simplificação algébrica, numeração de valores,
+SSA e SCCP. Sobre as instruções geradas: peephole, otimização de desvios e
+rastreamento do acumulador. Quem as usa é o SMLGenerator de compilador.py.
+
+Ficam fora de compilador.py porque o CPython recompila o script a cada
+`python3 compilador.py arquivo.txt`; um módulo importado usa o bytecode em
+cache (ver benchmarks/bench_startup.py). As definições compartilhadas (IR,
+opcodes, REF) vêm de compilador_ir.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import deque
+
+from compilador_ir import KW, MNEMONIC, OPND, REF, SML, Expr, IfGotoStmt, Stmt
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Callable, Dict, List, Optional, Tuple
+
+    from compilador import ProgramIndex
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# GRAFO DE FLUXO DE CONTROLE
+# ═══════════════════════════════════════════════════════════════════════════
+
+class CFG:
+    """Grafo de fluxo de controle sobre blocos básicos de statements.
+
+    block_of:    bloco de cada statement
+    start / end: statements [start, end) de cada bloco
+    succ / pred: arestas entre blocos (o bloco 0 é a entrada)
+    rpo:         blocos alcançáveis em pós-ordem reversa
+    idom:        dominador imediato (-1 na entrada e nos blocos inalcançáveis)
+    loop_header: cabeçalho do laço natural mais interno que contém o bloco (-1: nenhum)
+    loop_parent: para cada cabeçalho, o cabeçalho do laço que o envolve (-1: nenhum)
+
+    Tudo é construído em tempo quase linear no número de statements e desvios.
+    """
+    __slots__ = ('block_of', 'start', 'end', 'succ', 'pred', 'rpo', 'rpo_num', 'idom',
+                 'dom_pre', 'dom_post', 'loop_header', 'loop_parent')
+
+    def __init__(self, kws: array, target_idx: array):
+        self._build_blocks(kws, target_idx)
+        self._compute_rpo()
+        self._compute_dominators()
+        self._find_loops()
+
+    def __len__(self):
+        return len(self.start)
+
+    # ─── Blocos básicos ───────────────────────────────────────────────────
+
+    def _build_blocks(self, kws: array, target_idx: array):
+        n = len(kws)
+        leader = bytearray(n + 1)
+        leader[0] = 1
+        for i in range(n):
+            kw = kws[i]
+            if kw == KW.GOTO or kw == KW.IF or kw == KW.END:
+                leader[i + 1] = 1
+                if target_idx[i] >= 0:
+                    leader[target_idx[i]] = 1
+
+        block_of = array('l', [0] * n)
+        start, end = [], []
+        for i in range(n):
+            if leader[i]:
+                if start:
+                    end.append(i)
+                start.append(i)
+            block_of[i] = len(start) - 1
+        if start:
+            end.append(n)
+
+        nb = len(start)
+        succ = [[] for _ in range(nb)]
+        pred = [[] for _ in range(nb)]
+        for b in range(nb):
+            last = end[b] - 1
+            kw = kws[last]
+            if kw == KW.END:
+                continue
+            if kw != KW.GOTO and b + 1 < nb:
+                succ[b].append(b + 1)
+            if kw == KW.GOTO or kw == KW.IF:
+                t = block_of[target_idx[last]]
+                if t not in succ[b]:
+                    succ[b].append(t)
+            for t in succ[b]:
+                pred[t].append(b)
+
+        self.block_of, self.start, self.end = block_of, start, end
+        self.succ, self.pred = succ, pred
+
+    def _compute_rpo(self):
+        """Pós-ordem reversa dos blocos alcançáveis (DFS iterativa)."""
+        nb = len(self.start)
+        order = []
+        if nb:
+            succ = self.succ
+            seen = bytearray(nb)
+            seen[0] = 1
+            stack = [(0, 0)]
+            while stack:
+                b, i = stack[-1]
+                if i < len(succ[b]):
+                    stack[-1] = (b, i + 1)
+                    t = succ[b][i]
+                    if not seen[t]:
+                        seen[t] = 1
+                        stack.append((t, 0))
+                else:
+                    stack.pop()
+                    order.append(b)
+            order.reverse()
+        self.rpo = order
+        self.rpo_num = array('l', [-1] * nb)
+        for i, b in enumerate(order):
+            self.rpo_num[b] = i
+
+    # ─── Dominadores ──────────────────────────────────────────────────────
+
+    def _compute_dominators(self):
+        """Lengauer-Tarjan (versão simples, com compressão de caminhos)."""
+        nb = len(self.start)
+        pred = self.pred
+
+        # DFS em pré-ordem: vertex[i] é o i-ésimo bloco visitado
+        num = array('l', [-1] * nb)
+        vertex, dfs_parent = [], []
+        stack = [(0, -1)] if nb else []
+        while stack:
+            b, parent_num = stack.pop()
+            if num[b] >= 0:
+                continue
+            num[b] = len(vertex)
+            vertex.append(b)
+            dfs_parent.append(parent_num)
+            for t in reversed(self.succ[b]):
+                if num[t] < 0:
+                    stack.append((t, num[b]))
+
+        n = len(vertex)
+        semi = list(range(n))
+        label = list(range(n))
+        ancestor = [-1] * n
+        idom_num = [0] * n
+        bucket = [[] for _ in range(n)]
+
+        def evaluate(v: int) -> int:
+            if ancestor[v] < 0:
+                return v
+            path = []
+            u = v
+            while ancestor[ancestor[u]] >= 0:
+                path.append(u)
+                u = ancestor[u]
+            for u in reversed(path):
+                a = ancestor[u]
+                if semi[label[a]] < semi[label[u]]:
+                    label[u] = label[a]
+                ancestor[u] = ancestor[a]
+            return label[v]
+
+        for w in range(n - 1, 0, -1):
+            for p in pred[vertex[w]]:
+                v = num[p]
+                if v >= 0:
+                    u = evaluate(v)
+                    if semi[u] < semi[w]:
+                        semi[w] = semi[u]
+            bucket[semi[w]].append(w)
+            par = dfs_parent[w]
+            ancestor[w] = par
+            for v in bucket[par]:
+                u = evaluate(v)
+                idom_num[v] = u if semi[u] < semi[v] else par
+            bucket[par] = []
+        for w in range(1, n):
+            if idom_num[w] != semi[w]:
+                idom_num[w] = idom_num[idom_num[w]]
+
+        idom = array('l', [-1] * nb)
+        for w in range(1, n):
+            idom[vertex[w]] = vertex[idom_num[w]]
+        self.idom = idom
+
+        # Numeração pré/pós da árvore de dominadores: dominates() em O(1)
+        children = [[] for _ in range(nb)]
+        for b in self.rpo[1:]:
+            children[idom[b]].append(b)
+        pre = array('l', [-1] * nb)
+        post = array('l', [-1] * nb)
+        clock = 0
+        stack = [(0, 0)] if nb else []
+        while stack:
+            b, i = stack[-1]
+            if i == 0:
+                pre[b] = clock
+                clock += 1
+            if i < len(children[b]):
+                stack[-1] = (b, i + 1)
+                stack.append((children[b][i], 0))
+            else:
+                stack.pop()
+                post[b] = clock
+                clock += 1
+        self.dom_pre, self.dom_post = pre, post
+
+    def dominates(self, a: int, b: int) -> bool:
+        """O bloco a domina o bloco b (ambos alcançáveis)."""
+        pre = self.dom_pre
+        return pre[a] >= 0 and pre[b] >= 0 and pre[a] <= pre[b] and self.dom_post[b] <= self.dom_post[a]
+
+    def in_loop(self, b: int, h: int) -> bool:
+        """O bloco b pertence ao laço natural de cabeçalho h (ou a um laço dentro dele)."""
+        x = self.loop_header[b]
+        while x >= 0:
+            if x == h:
+                return True
+            x = self.loop_parent[x]
+        return False
+
+    # ─── Laços ────────────────────────────────────────────────────────────
+
+    def _find_loops(self):
+        """Laços naturais e seu aninhamento.
+
+        Os cabeçalhos são visitados do fim para o começo da RPO, então os laços
+        internos são montados antes dos externos; ao subir pelos predecessores,
+        um laço interno já montado é atravessado de uma vez pelo seu cabeçalho
+        mais externo (union-find com compressão de caminhos).
+        """
+        nb = len(self.start)
+        pred, rpo_num = self.pred, self.rpo_num
+        header = array('l', [-1] * nb)
+        parent = array('l', [-1] * nb)
+        rep = list(range(nb))            # union-find: laço mais externo já montado
+
+        def outermost(b: int) -> int:
+            root = b
+            while rep[root] != root:
+                root = rep[root]
+            while rep[b] != root:
+                rep[b], b = root, rep[b]
+            return root
+
+        for h in reversed(self.rpo):
+            latches = [p for p in pred[h] if self.dominates(h, p)]
+            if not latches:
+                continue
+            header[h] = h
+            work = latches
+            while work:
+                b = outermost(work.pop())
+                if b == h or rpo_num[b] < 0:
+                    continue
+                if header[b] < 0:
+                    header[b] = h        # bloco do corpo
+                else:
+                    parent[b] = h        # cabeçalho de um laço interno
+                rep[b] = h
+                work.extend(pred[b])
+        self.loop_header, self.loop_parent = header, parent
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ANÁLISE DE FLUXO DE DADOS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def solve_dataflow(cfg: CFG, gen: List[int], kill: List[int], forward: bool = True,
+                   entry: int = 0) -> Tuple[List[int], List[int]]:
+    """Resolve um problema de dataflow 'may' (junção por união) com worklist.
+
+    gen/kill: bitsets (int) de cada bloco. Retorna (antes, depois) de cada
+    bloco no sentido da análise: (IN, OUT) se forward, (OUT, IN) se backward.
+        forward:  IN = entry (só na entrada) ∪ OUT dos predecessores
+        backward: OUT = ∪ IN dos sucessores
+        e depois = gen ∪ (antes − kill).
+    Blocos inalcançáveis também são resolvidos (partem do conjunto vazio).
+    """
+    nb = len(cfg)
+    reachable = bytearray(nb)
+    for b in cfg.rpo:
+        reachable[b] = 1
+    order = cfg.rpo + [b for b in range(nb) if not reachable[b]]
+    if forward:
+        sources, targets = cfg.pred, cfg.succ
+    else:
+        order.reverse()
+        sources, targets = cfg.succ, cfg.pred
+
+    before = [0] * nb
+    after = [0] * nb
+    queued = bytearray(b'\x01' * nb)
+    work = deque(order)
+    while work:
+        b = work.popleft()
+        queued[b] = 0
+        x = entry if forward and b == 0 else 0
+        for p in sources[b]:
+            x |= after[p]
+        before[b] = x
+        y = gen[b] | (x & ~kill[b])
+        if y != after[b]:
+            after[b] = y
+            for t in targets[b]:
+                if not queued[t]:
+                    queued[t] = 1
+                    work.append(t)
+    return before, after
+
+
+def def_vars(index: ProgramIndex) -> array:
+    """Variável definida (let/input) por cada statement (-1: nenhuma)."""
+    def_var = array('b', [-1] * len(index.kws))
+    for v in range(26):
+        for d in index.defs[v]:
+            def_var[d] = v
+    return def_var
+
+
+def read_masks(index: ProgramIndex) -> array:
+    """Bitset das variáveis lidas por cada statement."""
+    reads = array('l', [0] * len(index.kws))
+    for v in range(26):
+        for u in index.uses[v]:
+            reads[u] |= 1 << v
+    return reads
+
+
+def live_variables(cfg: CFG, use_mask: array, def_var: array) -> array:
+    """Variáveis vivas na saída de cada statement (bitset por variável).
+
+    use_mask: variáveis lidas da memória por statement. Uma definição mata a
+    variável; a leitura no mesmo statement (let a = a + 1) vem antes.
+    """
+    nb = len(cfg)
+    gen, kill = [0] * nb, [0] * nb
+    for b in range(nb):
+        g = k = 0
+        for i in range(cfg.end[b] - 1, cfg.start[b] - 1, -1):
+            v = def_var[i]
+            if v >= 0:
+                g &= ~(1 << v)
+                k |= 1 << v
+            g |= use_mask[i]
+        gen[b], kill[b] = g, k
+    block_out, _ = solve_dataflow(cfg, gen, kill, False)
+
+    live_out = array('l', [0] * len(def_var))
+    for b in range(nb):
+        live = block_out[b]
+        for i in range(cfg.end[b] - 1, cfg.start[b] - 1, -1):
+            live_out[i] = live
+            v = def_var[i]
+            if v >= 0:
+                live &= ~(1 << v)
+            live |= use_mask[i]
+    return live_out
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SIMPLIFICAÇÃO ALGÉBRICA
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Regras: (nome, operação, padrões dos operandos, resultado)
+#   padrão:    literal (casa com operando de valor conhecido igual), 'x'
+#              (operando de valor desconhecido) ou '-x' (o operando 'x' negado)
+#   resultado: 'x', '-x', literal ou (operação, 'x', 'x')
+# Todas as ocorrências de 'x' são o mesmo operando. Nenhuma regra remove uma
+# divisão que pode parar o programa: 0 / x, x / x, 0 % x e x % x ficam para
+# a execução, que acusa a divisão por zero. A divisão trunca em direção a
+# zero, então x / -1 é exatamente -x.
+ALGEBRAIC_RULES = (
+    ('x+0', SML.ADD, ('x', 0), 'x'),
+    ('0+x', SML.ADD, (0, 'x'), 'x'),
+    ('x+-x', SML.ADD, ('x', '-x'), 0),
+    ('x-0', SML.SUB, ('x', 0), 'x'),
+    ('0-x', SML.SUB, (0, 'x'), '-x'),
+    ('x-x', SML.SUB, ('x', 'x'), 0),
+    ('x*0', SML.MUL, ('x', 0), 0),
+    ('0*x', SML.MUL, (0, 'x'), 0),
+    ('x*1', SML.MUL, ('x', 1), 'x'),
+    ('1*x', SML.MUL, (1, 'x'), 'x'),
+    ('x*-1', SML.MUL, ('x', -1), '-x'),
+    ('-1*x', SML.MUL, (-1, 'x'), '-x'),
+    ('x*2', SML.MUL, ('x', 2), (SML.ADD, 'x', 'x')),
+    ('2*x', SML.MUL, (2, 'x'), (SML.ADD, 'x', 'x')),
+    ('x/1', SML.DIV, ('x', 1), 'x'),
+    ('x/-1', SML.DIV, ('x', -1), '-x'),
+    ('x%1', SML.MOD, ('x', 1), 0),
+    ('x%-1', SML.MOD, ('x', -1), 0),
+)
+
+_ALGEBRAIC_BY_OP = {}
+for _rule in ALGEBRAIC_RULES:
+    _ALGEBRAIC_BY_OP.setdefault(_rule[1], []).append(_rule)
+
+
+def _negated(kind: int, v: int) -> Tuple[int, int]:
+    """Operando variável negado: x <-> -x."""
+    return (OPND.NEG if kind == OPND.VAR else OPND.VAR), v
+
+
+def simplify(expr: Expr, known: Callable[[int, int], Optional[int]]) -> Optional[Tuple[str, Expr]]:
+    """Primeira regra de ALGEBRAIC_RULES que casa: (nome, expressão reescrita) ou None.
+
+    known(kind, v) é o valor conhecido de um operando variável (None se
+    desconhecido); operandos conhecidos só casam com os padrões literais.
+    """
+    if expr.op == Expr.MOV:
+        return None
+    operands = ((expr.lk, expr.lv), (expr.rk, expr.rv))
+    for name, _, patterns, result in _ALGEBRAIC_BY_OP.get(expr.op, ()):
+        x = None
+        for pattern, (kind, v) in zip(patterns, operands):
+            value = v if kind == OPND.NUM else known(kind, v)
+            if isinstance(pattern, int):
+                if value != pattern:
+                    break
+                continue
+            if value is not None:
+                break
+            opnd = (kind, v) if pattern == 'x' else _negated(kind, v)
+            if x is None:
+                x = opnd
+            elif x != opnd:
+                break
+        else:
+            if isinstance(result, int):
+                return name, Expr(Expr.MOV, OPND.NUM, result)
+            if result == 'x':
+                return name, Expr(Expr.MOV, *x)
+            if result == '-x':
+                return name, Expr(Expr.MOV, *_negated(*x))
+            return name, Expr(result[0], *x, *x)
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SUBEXPRESSÕES COMUNS (NUMERAÇÃO DE VALORES)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def expr_key(expr: Expr, known: Callable[[int, int], Optional[int]]) -> Optional[Tuple[int, int, int, int, int]]:
+    """Número de valor da expressão: (op, lk, lv, rk, rv) canônico.
+
+    Operandos de valor conhecido viram literais e + e * têm os operandos
+    ordenados. None se a expressão é um operando simples (não vale a pena
+    reaproveitar); '-x' conta, porque custa duas instruções.
+    """
+    operands = []
+    for kind, v in ((expr.lk, expr.lv), (expr.rk, expr.rv))[:1 if expr.op == Expr.MOV else 2]:
+        if kind != OPND.NUM:
+            value = known(kind, v)
+            if value is not None:
+                kind, v = OPND.NUM, value
+        operands.append((kind, v))
+    if expr.op == Expr.MOV:
+        return (Expr.MOV, *operands[0], OPND.NUM, 0) if operands[0][0] == OPND.NEG else None
+    if (expr.op == SML.ADD or expr.op == SML.MUL) and operands[1] < operands[0]:
+        operands.reverse()
+    return (expr.op, *operands[0], *operands[1])
+
+
+class AvailableExprs:
+    """Expressões disponíveis em variáveis na entrada de cada statement.
+
+    Fato f: "a variável holder[f] contém o valor key[f]". Ele nasce num let
+    que grava a expressão (fora dela mesma: let a = a + b não conta) e morre
+    em qualquer definição da variável ou de um operando. Disponível = em
+    todos os caminhos; é resolvido como o complemento do problema 'may'
+    "talvez indisponível", que a entrada do programa gera por inteiro.
+
+    by_key:   {chave: [(variável, bit do fato)]}
+    avail_in: bitset dos fatos disponíveis antes de cada statement
+    """
+    __slots__ = ('by_key', 'avail_in')
+
+    def __init__(self, cfg: CFG, keys: List[Optional[Tuple]], def_var: array):
+        n = len(keys)
+        facts = {}
+        gen_at = array('l', [-1] * n)
+        for i, key in enumerate(keys):
+            v = def_var[i]
+            if key is not None and not any(key[k] != OPND.NUM and key[k + 1] == v for k in (1, 3)):
+                gen_at[i] = facts.setdefault((v, key), len(facts))
+
+        self.by_key = {}
+        kill_var = [0] * 26
+        for (v, key), f in facts.items():
+            self.by_key.setdefault(key, []).append((v, f))
+            kill_var[v] |= 1 << f
+            for k in (1, 3):
+                if key[k] != OPND.NUM:
+                    kill_var[key[k + 1]] |= 1 << f
+
+        # Talvez indisponível: gera o que o bloco mata, mata o que ele grava
+        nb = len(cfg)
+        gen, kill = [0] * nb, [0] * nb
+        for b in range(nb):
+            g = k = 0
+            for i in range(cfg.start[b], cfg.end[b]):
+                if def_var[i] >= 0:
+                    dead = kill_var[def_var[i]]
+                    g, k = g | dead, k & ~dead
+                if gen_at[i] >= 0:
+                    bit = 1 << gen_at[i]
+                    g, k = g & ~bit, k | bit
+            gen[b], kill[b] = g, k
+        every = (1 << len(facts)) - 1
+        block_in, _ = solve_dataflow(cfg, gen, kill, True, every)
+
+        avail_in = self.avail_in = [0] * n
+        for b in range(nb):
+            na = block_in[b]
+            for i in range(cfg.start[b], cfg.end[b]):
+                avail_in[i] = every & ~na
+                if def_var[i] >= 0:
+                    na |= kill_var[def_var[i]]
+                if gen_at[i] >= 0:
+                    na &= ~(1 << gen_at[i])
+
+    def holder(self, key: Optional[Tuple], i: int) -> int:
+        """Variável que contém o valor da chave antes do statement i (-1: nenhuma)."""
+        for v, f in self.by_key.get(key, ()):
+            if self.avail_in[i] >> f & 1:
+                return v
+        return -1
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FORMA SSA E PROPAGAÇÃO DE CONSTANTES CONDICIONAL
+# ═══════════════════════════════════════════════════════════════════════════
+
+def fold_op(op: int, a: int, b: int) -> Optional[int]:
+    """Valor de 'a op b' calculado como o Simpletron (None se não pode ser calculado).
+
+    Divisão e resto truncam em direção a zero (o resto tem o sinal do
+    dividendo). Divisão por zero e resultados fora da palavra ficam para a
+    execução, que acusa o erro.
+    """
+    if op == SML.ADD:
+        r = a + b
+    elif op == SML.SUB:
+        r = a - b
+    elif op == SML.MUL:
+        r = a * b
+    elif op == SML.DIV and b != 0:
+        r = abs(a) // abs(b)
+        if (a < 0) != (b < 0):
+            r = -r
+    elif op == SML.MOD and b != 0:
+        r = abs(a) % abs(b)
+        if a < 0:
+            r = -r
+    else:
+        return None
+    return r if -SML.WORD_MAX <= r <= SML.WORD_MAX else None
+
+
+def compare(relop: int, a: int, b: int) -> Optional[bool]:
+    """Resultado de 'a relop b' (relop é índice em RELOPS).
+
+    O if compara pelo sinal de a - b no acumulador: se a subtração estoura a
+    palavra, o resultado fica para a execução (None).
+    """
+    if fold_op(SML.SUB, a, b) is None:
+        return None
+    return (a == b, a != b, a < b, a <= b, a > b, a >= b)[relop]
+
+
+def _expr_reads(expr: Expr, out: List[int]):
+    """Acrescenta a out as variáveis lidas pela expressão."""
+    if expr.lk != OPND.NUM:
+        out.append(expr.lv)
+    if expr.op != Expr.MOV and expr.rk != OPND.NUM:
+        out.append(expr.rv)
+
+
+def stmt_reads(stmt: Stmt) -> List[int]:
+    """Variáveis lidas pelo statement (com repetição)."""
+    out = []
+    kind = stmt.kind
+    if kind == KW.PRINT:
+        out.append(stmt.var)
+    elif kind == KW.LET:
+        _expr_reads(stmt.expr, out)
+    elif kind == KW.IF:
+        _expr_reads(stmt.left, out)
+        _expr_reads(stmt.right, out)
+    return out
+
+
+class SSA:
+    """Forma SSA podada das variáveis sobre o CFG.
+
+    Phis só nas fronteiras de dominância em que a variável está viva.
+
+    Valores SSA: 0-25 são os valores iniciais das variáveis (a memória do
+    Simpletron começa zerada); depois vêm as definições (let/input) e os phis.
+    Só blocos alcançáveis recebem valores.
+
+    preds:      predecessores de cada bloco; o bloco 0 tem ainda -1 (entrada)
+    value_var:  variável de cada valor
+    def_value:  valor definido por cada statement (-1: nenhum)
+    reads:      por statement, {variável: valor lido}
+    phis:       por bloco, os phis (ids de valor) no início dele
+    phi_block:  {phi: bloco}
+    phi_args:   {phi: valor que chega por cada predecessor, alinhado com preds}
+    """
+    __slots__ = ('preds', 'value_var', 'def_value', 'reads', 'phis', 'phi_block', 'phi_args')
+
+    def __init__(self, cfg: CFG, ir: List[Stmt]):
+        nb = len(cfg)
+        self.preds = [list(p) for p in cfg.pred]
+        if nb:
+            self.preds[0].append(-1)
+        self.value_var = array('b', range(26))
+        self.def_value = array('l', [-1] * len(ir))
+        self.reads = [{} for _ in ir]
+        self.phis, self.phi_block, self.phi_args = [], {}, {}
+        if nb:
+            self._place_phis(cfg, ir)
+            self._rename(cfg, ir)
+
+    def __len__(self):
+        return len(self.value_var)
+
+    def _place_phis(self, cfg: CFG, ir: List[Stmt]):
+        """Fronteira de dominância iterada dos blocos que definem cada variável,
+        restrita aos blocos em que ela está viva na entrada."""
+        nb = len(cfg)
+        rpo_num, idom, block_of = cfg.rpo_num, cfg.idom, cfg.block_of
+
+        # Fronteiras de dominância (Cooper, Harvey e Kennedy)
+        frontier = [[] for _ in range(nb)]
+        for b in cfg.rpo:
+            preds = [p for p in self.preds[b] if p < 0 or rpo_num[p] >= 0]
+            if len(preds) < 2:
+                continue
+            for p in preds:
+                runner = p
+                while runner >= 0 and runner != idom[b]:
+                    if not frontier[runner] or frontier[runner][-1] != b:
+                        frontier[runner].append(b)
+                    runner = idom[runner]
+
+        def_blocks = [[0] for _ in range(26)]      # o valor inicial é definido na entrada
+        def_var = array('b', [-1] * len(ir))
+        use_mask = array('l', [0] * len(ir))
+        for i, stmt in enumerate(ir):
+            for v in stmt_reads(stmt):
+                use_mask[i] |= 1 << v
+            if stmt.kind == KW.LET or stmt.kind == KW.INPUT:
+                def_var[i] = stmt.var
+                if rpo_num[block_of[i]] >= 0:
+                    def_blocks[stmt.var].append(block_of[i])
+
+        # Variáveis vivas na entrada de cada bloco
+        live_out = live_variables(cfg, use_mask, def_var)
+        live_in = [0] * nb
+        for b in range(nb):
+            i = cfg.start[b]
+            live = live_out[i]
+            if def_var[i] >= 0:
+                live &= ~(1 << def_var[i])
+            live_in[b] = live | use_mask[i]
+
+        phis = [[] for _ in range(nb)]
+        phi_block, value_var = {}, self.value_var
+        queued = array('b', [-1] * nb)
+        placed = array('b', [-1] * nb)
+        for v in range(26):
+            work = []
+            for b in def_blocks[v]:
+                if queued[b] != v:
+                    queued[b] = v
+                    work.append(b)
+            while work:
+                for d in frontier[work.pop()]:
+                    if placed[d] != v and live_in[d] >> v & 1:
+                        placed[d] = v
+                        phi = len(value_var)
+                        value_var.append(v)
+                        phis[d].append(phi)
+                        phi_block[phi] = d
+                        if queued[d] != v:
+                            queued[d] = v
+                            work.append(d)
+        self.phis, self.phi_block = phis, phi_block
+        self.phi_args = {phi: [-1] * len(self.preds[b]) for phi, b in phi_block.items()}
+
+    def _rename(self, cfg: CFG, ir: List[Stmt]):
+        """Numera as definições e liga cada leitura ao seu valor (DFS na árvore de dominadores)."""
+        nb = len(cfg)
+        children = [[] for _ in range(nb)]
+        for b in cfg.rpo[1:]:
+            children[cfg.idom[b]].append(b)
+
+        value_var, def_value, reads = self.value_var, self.def_value, self.reads
+        phis, phi_args, preds = self.phis, self.phi_args, self.preds
+        for phi in phis[0]:
+            phi_args[phi][-1] = value_var[phi]        # entrada: valor inicial
+
+        cur = list(range(26))
+        stack = [(0, None)]
+        while stack:
+            b, saved = stack.pop()
+            if saved is not None:
+                cur = saved                             # saindo de b
+                continue
+            stack.append((b, cur[:]))
+
+            for phi in phis[b]:
+                cur[value_var[phi]] = phi
+            for i in range(cfg.start[b], cfg.end[b]):
+                stmt = ir[i]
+                here = reads[i]
+                for v in stmt_reads(stmt):
+                    here[v] = cur[v]
+                if stmt.kind == KW.LET or stmt.kind == KW.INPUT:
+                    val = len(value_var)
+                    value_var.append(stmt.var)
+                    def_value[i] = val
+                    cur[stmt.var] = val
+            for s in cfg.succ[b]:
+                k = preds[s].index(b)
+                for phi in phis[s]:
+                    phi_args[phi][k] = cur[value_var[phi]]
+            for c in children[b]:
+                stack.append((c, None))
+
+
+class SCCP:
+    """Propagação de constantes condicional esparsa (Wegman e Zadeck) sobre a SSA.
+
+    Otimista: um valor só deixa de ser constante quando algum caminho
+    executável prova isso, e um desvio só é seguido quando sua condição pode
+    levar a ele. Assim, constantes atravessam laços e ifs decididos em tempo
+    de compilação cortam os blocos que deixam de ser alcançáveis.
+
+    value:      por valor SSA, a constante (int) ou None (não constante)
+    executable: bloco executável
+    taken:      por statement 'if' executável: 1 sempre desvia, 0 nunca
+                desvia, -1 depende da execução
+    """
+    __slots__ = ('value', 'executable', 'taken')
+
+    TOP = object()          # ainda sem valor conhecido
+
+    def __init__(self, cfg: CFG, ssa: SSA, ir: List[Stmt], target_idx: array):
+        TOP = self.TOP
+        n, nb = len(ir), len(cfg)
+        value = self.value = [TOP] * len(ssa)
+        for v in range(26):
+            value[v] = 0
+        executable = self.executable = bytearray(nb)
+
+        # Quem usa cada valor: statements e phis
+        stmt_users = [[] for _ in range(len(ssa))]
+        phi_users = [[] for _ in range(len(ssa))]
+        for i, here in enumerate(ssa.reads):
+            for val in here.values():
+                stmt_users[val].append(i)
+        for phi, args in ssa.phi_args.items():
+            for val in args:
+                if val >= 0:
+                    phi_users[val].append(phi)
+
+        block_of, start, end = cfg.block_of, cfg.start, cfg.end
+        reads, def_value, preds = ssa.reads, ssa.def_value, ssa.preds
+        edges = set()
+        flow = deque([(-1, 0)] if nb else [])
+        work = deque()
+
+        def lower(val: int, new):
+            old = value[val]
+            if new is TOP or old is None or new == old:
+                return
+            value[val] = new if old is TOP else None
+            work.append(val)
+
+        def visit_phi(phi: int):
+            b = ssa.phi_block[phi]
+            result = TOP
+            for p, val in zip(preds[b], ssa.phi_args[phi]):
+                if (p, b) not in edges:
+                    continue
+                x = value[val]
+                if x is None or (result is not TOP and x is not TOP and x != result):
+                    result = None
+                    break
+                if x is not TOP:
+                    result = x
+            lower(phi, result)
+
+        def follow(b: int, t: int):
+            if (b, t) not in edges:
+                flow.append((b, t))
+
+        def visit_stmt(i: int):
+            stmt = ir[i]
+            kind = stmt.kind
+            b = block_of[i]
+            if kind == KW.LET:
+                lower(def_value[i], self._eval(stmt.expr, reads[i]))
+            elif kind == KW.INPUT:
+                lower(def_value[i], None)
+            elif kind == KW.GOTO:
+                follow(b, block_of[target_idx[i]])
+                return
+            elif kind == KW.IF:
+                cond = self._cond(stmt, reads[i])
+                if cond is TOP:
+                    return
+                if cond is None or cond:
+                    follow(b, block_of[target_idx[i]])
+                if cond is None or not cond:
+                    if b + 1 < nb:
+                        follow(b, b + 1)
+                return
+            elif kind == KW.END:
+                return
+            if i == end[b] - 1 and b + 1 < nb:
+                follow(b, b + 1)
+
+        while flow or work:
+            while flow:
+                edge = flow.popleft()
+                if edge in edges:
+                    continue
+                edges.add(edge)
+                b = edge[1]
+                for phi in ssa.phis[b]:
+                    visit_phi(phi)
+                if not executable[b]:
+                    executable[b] = 1
+                    for i in range(start[b], end[b]):
+                        visit_stmt(i)
+            while work:
+                val = work.popleft()
+                for phi in phi_users[val]:
+                    if executable[ssa.phi_block[phi]]:
+                        visit_phi(phi)
+                for i in stmt_users[val]:
+                    if executable[block_of[i]]:
+                        visit_stmt(i)
+
+        taken = self.taken = array('b', [-1] * n)
+        for i, stmt in enumerate(ir):
+            if stmt.kind == KW.IF and executable[block_of[i]]:
+                cond = self._cond(stmt, reads[i])
+                if cond is not None and cond is not TOP:
+                    taken[i] = 1 if cond else 0
+
+    def _operand(self, kind: int, v: int, here: Dict[int, int]):
+        if kind == OPND.NUM:
+            return v
+        x = self.value[here[v]]
+        if x is None or x is self.TOP or kind == OPND.VAR:
+            return x
+        return -x
+
+    def _eval(self, expr: Expr, here: Dict[int, int]):
+        """Valor da expressão no reticulado: TOP, constante ou None.
+
+        Com um operando não constante, as regras algébricas ainda podem dar
+        uma constante (x * 0, x - x, x % 1).
+        """
+        left = self._operand(expr.lk, expr.lv, here)
+        if expr.op == Expr.MOV:
+            return left
+        right = self._operand(expr.rk, expr.rv, here)
+        if left is None or right is None or left is self.TOP or right is self.TOP:
+            rewritten = simplify(expr, lambda kind, v: self._constant(kind, v, here))
+            if rewritten is not None and rewritten[1].op == Expr.MOV and rewritten[1].lk == OPND.NUM:
+                return rewritten[1].lv
+        if left is None or right is None:
+            return None
+        if left is self.TOP or right is self.TOP:
+            return self.TOP
+        return fold_op(expr.op, left, right)
+
+    def _constant(self, kind: int, v: int, here: Dict[int, int]) -> Optional[int]:
+        """Valor do operando se for constante (None para TOP e None)."""
+        x = self._operand(kind, v, here)
+        return None if x is self.TOP else x
+
+    def _cond(self, stmt: IfGotoStmt, here: Dict[int, int]):
+        """Condição do if no reticulado: TOP, bool ou None."""
+        left = self._eval(stmt.left, here)
+        right = self._eval(stmt.right, here)
+        if left is None or right is None:
+            return None
+        if left is self.TOP or right is self.TOP:
+            return self.TOP
+        return compare(stmt.relop, left, right)
+
+    def consts_read(self, ssa: SSA, i: int) -> Dict[int, int]:
+        """{variável: constante} das leituras constantes do statement i."""
+        value, TOP = self.value, self.TOP
+        return {v: value[val] for v, val in ssa.reads[i].items()
+                if value[val] is not None and value[val] is not TOP}
+
+    def folded_cfg(self, kws: array, target_idx: array) -> CFG:
+        """CFG com os ifs decididos trocados por goto (sempre) ou sem desvio (nunca).
+
+        Os blocos que deixaram de ser executáveis ficam inalcançáveis nele.
+        """
+        kws = array('B', kws)
+        for i, t in enumerate(self.taken):
+            if t == 1:
+                kws[i] = KW.GOTO
+            elif t == 0:
+                kws[i] = KW.REM         # statement sem efeito no fluxo
+        return CFG(kws, target_idx)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# OTIMIZADOR PEEPHOLE
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Regras: (nome, janela, reescrita)
+#   janela:    (opcode, nome do operando, REF exigido ou None)
+#   reescrita: (opcode, nome do operando da janela)
+# Ocorrências do mesmo nome são o mesmo operando; nomes diferentes, operandos
+# diferentes. Só a primeira instrução da janela pode ser destino de desvio.
+PEEPHOLE_RULES = (
+    # STORE x; LOAD x: o acumulador já tem x
+    ('store-load', ((SML.STORE, 'x', None), (SML.LOAD, 'x', None)),
+     ((SML.STORE, 'x'),)),
+    # LOAD x; STORE x: a memória já tem x
+    ('load-store', ((SML.LOAD, 'x', None), (SML.STORE, 'x', None)),
+     ((SML.LOAD, 'x'),)),
+    # LOAD x; LOAD y: o primeiro LOAD é sobrescrito
+    ('load-load', ((SML.LOAD, 'x', None), (SML.LOAD, 'y', None)),
+     ((SML.LOAD, 'y'),)),
+)
+
+_RULES_BY_OP = {}
+for _rule in PEEPHOLE_RULES:
+    _RULES_BY_OP.setdefault(_rule[1][0][0], []).append(_rule)
+
+
+def _match_window(insns: List[Tuple], i: int, window: Tuple, targets: set) -> Optional[Dict]:
+    """Operandos da janela casada em i ({nome: (REF, símbolo, texto)}) ou None."""
+    if i + len(window) > len(insns):
+        return None
+    bound = {}
+    for k, (op, name, kind) in enumerate(window):
+        c_op, ref, sym, comment = insns[i + k]
+        if c_op != op or ref == REF.NONE or (kind is not None and ref != kind):
+            return None
+        if k and i + k in targets:
+            return None
+        if name in bound:
+            if bound[name][:2] != (ref, sym):
+                return None
+        elif any(b[:2] == (ref, sym) for b in bound.values()):
+            return None
+        else:
+            bound[name] = (ref, sym, comment.split(' ', 1)[1])
+    return bound
+
+
+def peephole(insns: List[Tuple], labels: Dict[int, int], hits: Dict[str, int]) -> List[Tuple]:
+    """Aplica PEEPHOLE_RULES até o ponto fixo.
+
+    insns: (op, REF, símbolo, comentário); labels (label -> posição) é
+    atualizado. hits conta as aplicações de cada regra.
+    """
+    changed = True
+    while changed:
+        changed = False
+        targets = {labels[sym] for _, ref, sym, _ in insns if ref == REF.LABEL}
+        out = []
+        moved = array('l', [0] * (len(insns) + 1))     # posição antiga -> nova
+        i, n = 0, len(insns)
+        while i < n:
+            for name, window, rewrite in _RULES_BY_OP.get(insns[i][0], ()):
+                bound = _match_window(insns, i, window, targets)
+                if bound is None:
+                    continue
+                for k in range(len(window)):
+                    moved[i + k] = len(out)
+                for op, operand in rewrite:
+                    ref, sym, text = bound[operand]
+                    out.append((op, ref, sym, f"{MNEMONIC[op]} {text}"))
+                hits[name] += 1
+                i += len(window)
+                changed = True
+                break
+            else:
+                moved[i] = len(out)
+                out.append(insns[i])
+                i += 1
+        moved[n] = len(out)
+        for label, pos in labels.items():
+            labels[label] = moved[pos]
+        insns = out
+    return insns
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# OTIMIZAÇÃO DE DESVIOS
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Reescritas da otimização de desvios (chaves das estatísticas)
+BRANCH_RULES = ('encadeamento', 'goto-end', 'goto-next', 'mesmo-destino', 'inalcançável')
+
+_BRANCH_TEXT = {SML.BRANCH: "goto", SML.BRANCHNEG: "if < goto", SML.BRANCHZERO: "if == goto"}
+
+
+def _branch_chain(insns: List[Tuple], labels: Dict[int, int], sym: int) -> Optional[int]:
+    """Label final de uma cadeia de BRANCHs que começa em sym (None se ela for um ciclo)."""
+    seen = set()
+    pos = labels[sym]
+    while pos < len(insns) and insns[pos][0] == SML.BRANCH and insns[pos][1] == REF.LABEL:
+        if pos in seen:
+            return None         # goto em ciclo: o programa não termina por aqui
+        seen.add(pos)
+        sym = insns[pos][2]
+        pos = labels[sym]
+    return sym
+
+
+def optimize_branches(insns: List[Tuple], labels: Dict[int, int], hits: Dict[str, int]) -> List[Tuple]:
+    """Encadeamento de desvios e remoção dos desvios inúteis, até o ponto fixo.
+
+    Um desvio para um BRANCH passa a ir direto ao destino final; um goto que
+    chega a um HALT vira HALT. Somem os desvios para a instrução seguinte, o
+    condicional seguido de um BRANCH para o mesmo lugar e o código depois de
+    um BRANCH/HALT que nenhum desvio alcança. O SML não tem desvio "se não
+    zero": o if-skip-goto de != e >= só se desfaz quando o destino dele ou o
+    do skip se resolve por encadeamento (ex.: if seguido de goto).
+    """
+    changed = True
+    while changed:
+        changed = False
+        n = len(insns)
+
+        # Encadeamento e goto para o end
+        for i in range(n):
+            op, ref, sym, comment = insns[i]
+            if op not in _BRANCH_TEXT or ref != REF.LABEL:
+                continue
+            final = _branch_chain(insns, labels, sym)
+            if final is None:
+                continue
+            pos = labels[final]
+            if op == SML.BRANCH and pos < n and insns[pos][0] == SML.HALT:
+                insns[i] = (SML.HALT, REF.NONE, 0, f"halt ({comment})")
+                hits['goto-end'] += 1
+                changed = True
+            elif final != sym:
+                insns[i] = (op, ref, final, f"{_BRANCH_TEXT[op]} {final if final >= 0 else 'skip'}")
+                hits['encadeamento'] += 1
+                changed = True
+
+        # Remoção
+        targets = {labels[sym] for _, ref, sym, _ in insns if ref == REF.LABEL}
+        out = []
+        moved = array('l', [0] * (n + 1))       # posição antiga -> nova
+        dead = False
+        for i in range(n):
+            op, ref, sym, _ = insns[i]
+            moved[i] = len(out)
+            if i in targets:
+                dead = False
+            if dead:
+                rule = 'inalcançável'
+            elif op in _BRANCH_TEXT and ref == REF.LABEL and labels[sym] == i + 1:
+                rule = 'goto-next'
+            elif (op != SML.BRANCH and op in _BRANCH_TEXT and ref == REF.LABEL and i + 1 < n
+                    and insns[i + 1][0] == SML.BRANCH and insns[i + 1][1] == REF.LABEL
+                    and labels[insns[i + 1][2]] == labels[sym]):
+                rule = 'mesmo-destino'
+            else:
+                out.append(insns[i])
+                dead = op == SML.BRANCH or op == SML.HALT
+                continue
+            hits[rule] += 1
+            changed = True
+        moved[n] = len(out)
+        for label, pos in labels.items():
+            labels[label] = moved[pos]
+        insns = out
+    return insns
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RASTREAMENTO DO ACUMULADOR
+# ═══════════════════════════════════════════════════════════════════════════
+
+def track_accumulator(insns: List[Tuple], labels: Dict[int, int], hits: Dict[str, int]) -> List[Tuple]:
+    """Remove LOADs e STOREs de operandos que o acumulador já contém.
+
+    Dataflow para frente sobre as instruções: o estado é o conjunto de
+    operandos (REF, símbolo) cujo valor está no acumulador, com interseção
+    nos destinos de desvio. LOAD m deixa só m (ou nada muda, se m já estava
+    lá); STORE m acrescenta m; READ m tira m; as operações aritméticas
+    esvaziam o conjunto. Um LOAD ou STORE de operando do conjunto não muda
+    nada e sai.
+
+    Roda por último: a partir daqui o acumulador pode estar vivo no início
+    de um statement.
+    """
+    n = len(insns)
+    succ = []
+    for i, (op, ref, sym, _) in enumerate(insns):
+        out = [] if op == SML.BRANCH or op == SML.HALT or i + 1 >= n else [i + 1]
+        if ref == REF.LABEL and labels[sym] < n and labels[sym] not in out:
+            out.append(labels[sym])
+        succ.append(out)
+
+    state = [None] * n          # operandos no acumulador antes da instrução (None: não visitada)
+    work = deque([0] if n else [])
+    if n:
+        state[0] = frozenset()
+    while work:
+        i = work.popleft()
+        op, ref, sym, _ = insns[i]
+        held = state[i]
+        operand = (ref, sym)
+        if op == SML.LOAD:
+            after = held if operand in held else frozenset((operand,))
+        elif op == SML.STORE:
+            after = held | {operand}
+        elif op == SML.READ:
+            after = held - {operand}
+        elif op == SML.WRITE or op in _BRANCH_TEXT:
+            after = held
+        else:
+            after = frozenset()
+        for t in succ[i]:
+            new = after if state[t] is None else state[t] & after
+            if new != state[t]:
+                state[t] = new
+                work.append(t)
+
+    out = []
+    moved = array('l', [0] * (n + 1))       # posição antiga -> nova
+    for i, insn in enumerate(insns):
+        moved[i] = len(out)
+        op = insn[0]
+        if (op == SML.LOAD or op == SML.STORE) and state[i] is not None and insn[1:3] in state[i]:
+            hits['load' if op == SML.LOAD else 'store'] += 1
+            continue
+        out.append(insn)
+    moved[n] = len(out)
+    for label, pos in labels.items():
+        labels[label] = moved[pos]
+    return out
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Servidor de compilação SIMPLE → SML (processo de longa duração).
+
+Uso:
+    python3 compilador_servidor.py                 # socket Unix padrão
+    python3 compilador_servidor.py --socket /tmp/simple.sock -j 4
+    python3 compilador_servidor.py --stdio          # JSON lines em stdin/stdout
+
+Evita pagar a inicialização do CPython e dos imports a cada compilação. O
+protocolo é JSON lines; cada requisição pode trazer um "id", devolvido na
+resposta, e um "cwd" para resolver caminhos relativos. Requisições podem ser
+enviadas em pipeline: as respostas saem na ordem em que ficam prontas.
+
+    {"id": 1, "fonte": "10 input a\\n20 print a\\n30 end\\n", "listagem": true}
+    {"id": 2, "arquivo": "/abs/prog.txt", "saida": "/abs/binary.txt"}
+    {"id": 3, "arquivo": "prog.txt", "cwd": "/home/aluno", "relatorio": true}
+    {"id": 4, "op": "stats"}
+
+Com "relatorio", a resposta traz o texto e o código de saída do CLI (usado
+por compilador_cliente.py). A compilação roda num pool de processos; no
+máximo --max-pendentes requisições ficam em andamento, e a leitura de novas
+requisições espera quando o limite é atingido (backpressure). Uma linha maior
+que STREAM_LIMIT recebe {"id": null, "erro": ...} e encerra a conexão.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from compilador import compile_report, compile_source
+
+STREAM_LIMIT = 64 << 20     # maior linha JSON aceita (fonte embutido)
+LATENCY_WINDOW = 10000      # amostras usadas em p50/p99
+
+
+def default_socket() -> str:
+    """Caminho padrão do socket (sobrescrito por $SIMPLE_SOCKET)."""
+    return os.environ.get('SIMPLE_SOCKET') or f"/tmp/compilador-simple-{os.getuid()}.sock"
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TRABALHO NO POOL
+# ═══════════════════════════════════════════════════════════════════════════
+
+def run_request(req: Dict) -> Dict:
+    """Executa uma requisição de compilação (roda num processo do pool)."""
+    if req.get('relatorio'):
+        text, status = compile_report(req['arquivo'], req.get('saida', 'binary.txt'), req.get('cwd'))
+        return {'relatorio': text, 'codigo': status}
+
+    cwd = req.get('cwd') or ''
+    if 'fonte' in req:
+        source = req['fonte']
+    else:
+        with open(os.path.join(cwd, req['arquivo']), 'rb') as f:
+            source = f.read()
+
+    output = req.get('saida')
+    result = compile_source(source, os.path.join(cwd, output) if output else None)
+    resp = {'ok': result.ok, 'palavras': result.words, 'erros': [e.as_dict() for e in result.errors],
+            'overflow': result.overflow, 'stats': result.stats}
+    if req.get('listagem') and result.ok:
+        resp['listagem'] = result.listing
+    return resp
+
+
+def _ignore_sigint():
+    """Ctrl+C é tratado só pelo servidor; os processos do pool são encerrados por ele."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SERVIDOR
+# ═══════════════════════════════════════════════════════════════════════════
+
+class LatencyStats:
+    """Contadores de latência (janela das últimas LATENCY_WINDOW requisições)."""
+
+    def __init__(self):
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+        self.total = 0
+        self.errors = 0
+
+    def record(self, ms: float, ok: bool):
+        self.samples.append(ms)
+        self.total += 1
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+    def snapshot(self) -> Dict:
+        return {'requisicoes': self.total, 'falhas': self.errors,
+                'p50_ms': self.percentile(0.50), 'p99_ms': self.percentile(0.99)}
+
+
+class CompileServer:
+    """Atende conexões JSON lines despachando as compilações para o pool."""
+
+    def __init__(self, workers: int, max_pending: int):
+        # forkserver: processos criados sob demanda não herdam os sockets
+        # das conexões abertas (com fork, o cliente nunca veria o EOF)
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['compilador'])
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                        initializer=_ignore_sigint)
+        self.slots = asyncio.Semaphore(max_pending)
+        self.stats = LatencyStats()
+        self.pending = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Lê requisições em pipeline e responde conforme ficam prontas."""
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                await self.slots.acquire()      # backpressure: para de ler no limite
+                try:
+                    line = await reader.readline()
+                except ValueError as e:         # linha acima de STREAM_LIMIT
+                    self.slots.release()
+                    await self._reply({'id': None, 'erro': f"{type(e).__name__}: {e}"}, writer, lock)
+                    self.stats.record(0.0, False)
+                    break
+                except BaseException:
+                    self.slots.release()
+                    raise
+                if not line:
+                    self.slots.release()
+                    break
+                task = asyncio.create_task(self._serve(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve(self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock):
+        t0 = time.perf_counter()
+        self.pending += 1
+        req_id = None
+        try:
+            req = json.loads(line)
+            req_id = req.get('id')
+            if req.get('op') == 'stats':
+                resp = dict(self.stats.snapshot(), pendentes=self.pending - 1)
+            else:
+                loop = asyncio.get_running_loop()
+                resp = await loop.run_in_executor(self.pool, run_request, req)
+            ok = True
+        except Exception as e:        # requisição malformada ou falha de E/S
+            resp = {'erro': f"{type(e).__name__}: {e}"}
+            ok = False
+        finally:
+            self.pending -= 1
+
+        resp['id'] = req_id
+        try:
+            await self._reply(resp, writer, lock)
+        except ConnectionError:         # o cliente desconectou antes da resposta
+            pass
+        finally:
+            self.stats.record((time.perf_counter() - t0) * 1000, ok)
+            self.slots.release()
+
+    async def _reply(self, resp: Dict, writer: asyncio.StreamWriter, lock: asyncio.Lock):
+        data = json.dumps(resp, ensure_ascii=False).encode('utf-8') + b"\n"
+        async with lock:
+            writer.write(data)
+            await writer.drain()
+
+    async def warm_up(self):
+        """Sobe o forkserver e um processo antes da primeira requisição."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.pool, run_request, {'fonte': "10 end\n"})
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+class _FileWriter:
+    """Escrita bloqueante em stdout quando ele não é pipe/socket (ex.: arquivo)."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data: bytes):
+        self.stream.write(data)
+
+    async def drain(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+async def _stdio_streams():
+    """StreamReader/StreamWriter sobre stdin/stdout."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STREAM_LIMIT)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    try:
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    except ValueError:
+        return reader, _FileWriter(sys.stdout.buffer)
+    return reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+
+
+async def serve(socket_path: Optional[str], workers: int, max_pending: int):
+    """Roda o servidor até EOF (stdio) ou SIGINT/SIGTERM (socket)."""
+    server = CompileServer(workers, max_pending)
+    try:
+        await server.warm_up()
+        if socket_path is None:
+            await server.handle(*await _stdio_streams())
+            return
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        listener = await asyncio.start_unix_server(server.handle, socket_path, limit=STREAM_LIMIT)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        print(f"✓ Servidor ouvindo em {socket_path} ({workers} processo(s))", file=sys.stderr)
+
+        async with listener:
+            await stop.wait()
+        os.unlink(socket_path)
+    finally:
+        server.close()
+        snap = server.stats.snapshot()
+        print(f"✓ {snap['requisicoes']} requisição(ões), p50 {snap['p50_ms']} ms, "
+              f"p99 {snap['p99_ms']} ms", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Servidor de compilação SIMPLE → SML (JSON lines)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--socket', default=None, help='Socket Unix (padrão: $SIMPLE_SOCKET ou /tmp)')
+    mode.add_argument('--stdio', action='store_true', help='Atende JSON lines em stdin/stdout')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Processos no pool (padrão: núcleos disponíveis)')
+    parser.add_argument('--max-pendentes', type=int, default=None,
+                        help='Limite de requisições em andamento (padrão: 4 por processo)')
+    args = parser.parse_args()
+
+    socket_path = None if args.stdio else (args.socket or default_socket())
+    asyncio.run(serve(socket_path, args.jobs, args.max_pendentes or 4 * args.jobs))
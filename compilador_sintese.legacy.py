@@ -12,7 +12,6 @@ Arquitetura:
     4. Máquina Virtual: Executa o bytecode gerado
 """
 
-import re
 import sys
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Union, Any
@@ -625,12 +624,16 @@ class VirtualMachine:
 # ============================================================================
 
 def compile_and_run(source_file: str, show_code: bool = False):
-    """Pipeline completo: análise -> síntese -> execução."""
+    """Pipeline completo: análise -> síntese -> execução.
+
+    O fonte é lido e tokenizado uma única vez: os tokens e as informações de
+    linha da análise alimentam diretamente o ASTBuilder.
+    """
     # Importar analisador
-    from compilador_analise import analyze_file, lex_rest
+    from compilador_analise import analyze_program
 
-    # Fase 1: Análise
-    errors = analyze_file(source_file)
+    # Fase 1: Análise (tokens e linhas são reaproveitados pela síntese)
+    errors, non_comment_lines, tokens_by_line = analyze_program(source_file)
     if errors:
         print('\nErros detectados durante análise:')
         for e in sorted(errors, key=lambda x: (x.file_line, x.col)):
@@ -640,51 +643,17 @@ def compile_and_run(source_file: str, show_code: bool = False):
 
     print("✓ Análise léxica, sintática e semântica: OK")
 
-    # Fase 2: Construir tokens e info
-    with open(source_file, 'r', encoding='utf-8') as f:
-        raw_lines = f.readlines()
-
-    non_comment_lines = []
-    tokens_by_line = {}
-
-    for idx, raw in enumerate(raw_lines, start=1):
-        line = raw.rstrip('\n')
-        if line.strip() == '':
-            continue
-        m = re.match(r'^\s*(\d+)\s+(.*)$', line)
-        if not m:
-            continue
-        label = int(m.group(1))
-        rest = m.group(2)
-        rest_start_col = m.start(2) + 1
-
-        if re.match(r'^rem(\b|$)', rest):
-            continue
-
-        non_comment_lines.append({
-            'file_line': idx,
-            'label': label,
-            'line_text': line,
-            'rest': rest,
-            'rest_start_col': rest_start_col
-        })
-
-        # Lex
-        errors_temp = []
-        toks = lex_rest(rest, idx, label, rest_start_col, errors_temp)
-        tokens_by_line[idx] = toks
-
-    # Fase 3: Construir AST
+    # Fase 2: Construir AST
     print("✓ Construindo AST...")
     builder = ASTBuilder(tokens_by_line, non_comment_lines)
     ast = builder.build()
 
-    # Fase 4: Otimizar
+    # Fase 3: Otimizar
     print("✓ Otimizando código...")
     optimizer = CodeOptimizer(ast)
     optimized_ast = optimizer.optimize()
 
-    # Fase 5: Gerar código
+    # Fase 4: Gerar código
     print("✓ Gerando bytecode...")
     generator = CodeGenerator(optimized_ast)
     bytecode = generator.generate()
@@ -695,7 +664,7 @@ def compile_and_run(source_file: str, show_code: bool = False):
             print(f"{i:3d}: {instr}")
         print("----------------------\n")
 
-    # Fase 6: Executar
+    # Fase 5: Executar
     print("✓ Executando programa SIMPLE...\n")
     vm = VirtualMachine(bytecode)
     vm.run()
@@ -44,8 +44,15 @@ test_valid() {
         MEM=$(echo "$OUTPUT" | grep -oP '\d+/100 palavras usadas' | head -1)
         MEM_PCT=$(echo "$MEM" | grep -oP '^\d+')
 
+        # Imagem esperada (testes de regressão das otimizações)
+        local expected="testes/esperado/${name}.bin.txt"
+
         # Valida que tem binary.txt
-        if [ -f "binary.txt" ]; then
+        if [ -f "binary.txt" ] && [ -f "$expected" ] && ! cmp -s binary.txt "$expected"; then
+            echo -e "${RED}✗ FAIL${NC} (SML difere de ${expected})"
+            RESULTS+=("${name}: ✗ FAIL (SML difere de ${expected})")
+            FAILED_TESTS=$((FAILED_TESTS + 1))
+        elif [ -f "binary.txt" ]; then
             echo -e "${GREEN}✓ OK${NC} (${MEM})"
             RESULTS+=("${name}: ✓ OK (${MEM})")
             MEMORY_USAGE+=("${name}|${MEM_PCT}")
@@ -79,8 +86,15 @@ test_error() {
         RESULTS+=("${name}: ✗ FAIL (deveria detectar erro)")
         FAILED_TESTS=$((FAILED_TESTS + 1))
     else
+        # O modo --stream deve reportar os mesmos erros
+        STREAM=$(python3 compilador.py --stream "$file" 2>&1 || true)
+
         # Verifica se detectou erro
-        if echo "$OUTPUT" | grep -q "erro(s) encontrado(s)"; then
+        if [ "$(echo "$OUTPUT" | grep '^\[' | sort)" != "$(echo "$STREAM" | grep '^\[' | sort)" ]; then
+            echo -e "${RED}✗ FAIL${NC} (--stream reporta erros diferentes)"
+            RESULTS+=("${name}: ✗ FAIL (--stream reporta erros diferentes)")
+            FAILED_TESTS=$((FAILED_TESTS + 1))
+        elif echo "$OUTPUT" | grep -q "erro(s) encontrado(s)"; then
             ERRS=$(echo "$OUTPUT" | grep -oP '\d+ erro\(s\)' | grep -oP '^\d+')
             echo -e "${GREEN}✓ OK${NC} (${ERRS} erro(s) detectado(s))"
             RESULTS+=("${name}: ✓ OK (${ERRS} erro(s) detectado(s))")